@@ -0,0 +1,74 @@
+/**
+ * Client for the search index written by the site generators (sitegen/search.py).
+ * Only index.json of each section and the shards for the query's term
+ * prefixes are fetched; every word of the query must match the start of an
+ * indexed term.
+ *
+ *   SiteSearch.query('face recog', { root: '../' }).then(results => ...)
+ */
+const SiteSearch = (() => {
+  "use strict";
+
+  const sections = ['blog', 'portfolio'];
+  const stopWords = new Set(`a about after all also an and any are as at be been but by can could do does for from
+    had has have how i if in into is it its more most my no not of on or our so such than that the their them then
+    there these they this those through to too up us was we were what when where which while who why will with you
+    your`.split(/\s+/));
+  const cache = new Map();
+
+  function fetchJson(url) {
+    if (!cache.has(url)) {
+      cache.set(url, fetch(url).then(response => response.ok ? response.json() : null).catch(() => null));
+    }
+    return cache.get(url);
+  }
+
+  function queryWords(text) {
+    return (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(word => word.length >= 2 && !stopWords.has(word));
+  }
+
+  async function searchSection(root, section, words) {
+    const base = `${root}search/${section}/`;
+    const index = await fetchJson(`${base}index.json`);
+    if (!index) return [];
+
+    let scores = null;
+    for (const word of words) {
+      const prefix = word.slice(0, index.prefix);
+      const shard = index.shards.includes(prefix) ? await fetchJson(`${base}${prefix}.json`) : null;
+      const wordScores = new Map();
+      for (const [term, postings] of Object.entries(shard || {})) {
+        if (!term.startsWith(word)) continue;
+        // Exact matches rank above words that merely start with the query
+        const boost = term === word ? 2 : 1;
+        for (let i = 0; i < postings.length; i += 2) {
+          wordScores.set(postings[i], (wordScores.get(postings[i]) || 0) + postings[i + 1] * boost);
+        }
+      }
+      if (scores === null) {
+        scores = wordScores;
+      } else {
+        for (const doc of scores.keys()) {
+          if (wordScores.has(doc)) scores.set(doc, scores.get(doc) + wordScores.get(doc));
+          else scores.delete(doc);
+        }
+      }
+      if (scores.size === 0) break;
+    }
+
+    return [...(scores || new Map()).entries()].map(([doc, score]) => {
+      const [url, title, summary] = index.docs[doc];
+      return { url: root + url, title, summary, section, score };
+    });
+  }
+
+  async function query(text, options = {}) {
+    const root = options.root || '';
+    const words = queryWords(text);
+    if (words.length === 0) return [];
+    const results = await Promise.all((options.sections || sections).map(section => searchSection(root, section, words)));
+    return results.flat().sort((a, b) => b.score - a.score).slice(0, options.limit || 20);
+  }
+
+  return { query };
+})();
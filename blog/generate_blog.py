@@ -1,97 +1,34 @@
+import argparse
 import os
+import sys
 import json
 
-# JSON to HTML blog generator
-def generate_blogs_from_json(json_file):
-    with open(json_file, 'r') as file:
-        blogs = json.load(file)
-
-    # Loop through each blog in the JSON file
-    for blog in blogs:
-        file_name = blog['file_name']
-        title = blog['title']
-        description = blog['description']
-        image_path = blog['image_path']
-        author = blog['author']
-        date = blog['date']
-        content = blog['content']
-        keywords = blog['keywords']
-
-        # Output file path
-        output_file = f"{file_name}.html"
-
-        # Skip if file already exists
-        # if os.path.exists(output_file):
-        #     print(f"File {output_file} already exists. Skipping...")
-        #     continue
-
-        # HTML structure
-        html_content = f"""<!DOCTYPE html>
-<html lang="en">
-  <head>
-  <meta charset="utf-8">
-  <meta content="width=device-width, initial-scale=1.0" name="viewport">
-
-  <title>BITS India - Business & IT Solutions - Innovating Defence & Commercial Technology</title>
-  <meta content="" name="BITS India - Business & IT Solutions | Innovating Defence & Commercial Technology">
-  <meta name="description" content="BITS India - Business & IT Solutions | Innovating Defence & Commercial Technology">
-
-  <meta name="keywords" content={keywords}/>
-
-  <!-- Favicons -->
-  <link href="../assets/images/favicon.png" rel="icon">
-  <link href="../assets/images/apple-touch-icon.png" rel="apple-touch-icon">
-
-  <!-- Google Fonts -->
-  <link href="../../../css2?family=Open+Sans:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,600;1,700&amp;family=Montserrat:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;family=Raleway:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;display=swap" rel="stylesheet">
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin="">
-  <link href="../../../css2-1?family=Oswald:wght@500&amp;display=swap" rel="stylesheet">
-  <link href="../../../css2-2?family=Poppins:wght@300;400&amp;display=swap" rel="stylesheet">
-  <!-- Vendor CSS Files -->
-  <link href="../assets/vendor/aos/aos.css" rel="stylesheet">
-  <link href="../assets/vendor/swiper/swiper-bundle.min.css" rel="stylesheet">
-  <link href="../assets/stylesheets/font-awesome.min.css" rel="stylesheet">
-  <link href="../assets/vendor/glightbox/css/glightbox.min.css" rel="stylesheet">
-  <link href="../assets/vendor/bootstrap/css/bootstrap.min.css" rel="stylesheet">
-  <link href="../assets/vendor/bootstrap-icons/bootstrap-icons.css" rel="stylesheet">
-  <!-- Main CSS File -->
-  <link href="../assets/stylesheets/styles.css" rel="stylesheet">
-
-</head>
-
-<body>
-
-  <header id="header" class="header d-flex align-items-center sticked stikcy-menu">
-    <div class="container-fluid container-xl d-flex align-items-center justify-content-between">
-      <a href="../index.html" class="logo d-flex align-items-center">
-        <img src="../assets/images/Logo-new.png" alt="logo">
-      </a>
-      <nav id="navbar" class="navbar">
-        <ul>
-          <li><a href="../index.html" class="">Home</a></li>
-          <li><a href="../services.html" class="">Services</a></li>
-          <li><a href="../portfolio.html" class="">Portfolio</a></li>
-          <li><a href="../testimonials.html" class="">Testimonials</a></li>
-          <!-- <li><a href="team.html" class="">Team</a></li> -->
-          <li class="dropdown"><a href="#"><span>Menu</span> <i class="bi bi-chevron-down dropdown-indicator"></i></a>
-            <ul>
-              <li><a href="../about.html">About</a></li>
-              <li><a href="../faqs.html">FAQs</a></li>
-              <li><a href="../privacy-policy.html">Privacy Policy</a></li>
-            </ul>
-          </li>
-          <li><a href="../blogs.html">Blogs</a></li>
-        </ul>
-      </nav><!-- .navbar -->
-      <a href="../contact.html" class="btn-get-started hide-on-mobile">Get Quotes</a>
-      <button id="darkmode-button"><i class="bi bi-moon-fill"></i></button>
-      <i class="mobile-nav-toggle mobile-nav-show bi bi-list"></i>
-      <i class="mobile-nav-toggle mobile-nav-hide d-none bi bi-x"></i>
-    </div>
-  </header>
-
-  <div class="breadcrumbs">
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sitegen import layout as site_layout
+from sitegen import minify as site_minify
+from sitegen.bundle import build_bundle
+from sitegen.critical import extract_critical_css
+from sitegen.manifest import BuildManifest, record_digest, source_digest, state_path
+from sitegen.output import write_if_changed
+from sitegen.search import SearchDocument, publish_search_index, strip_tags, summarize
+from sitegen.sitemap import FEED_ENTRIES, SITE_URL, publish_sitemap, render_atom_feed
+from sitegen.timing import build_report, stage
+from sitegen.watch import code_files, watch
+
+def render_blog_page(blog, layout):
+    """
+    Render one blog post page to bytes
+    """
+    title = blog['title']
+    description = blog['description']
+    image_path = blog['image_path']
+    author = blog['author']
+    date = blog['date']
+    content = blog['content']
+    keywords = blog['keywords']
+
+    # Page body; head, header and footer come from the shared layout
+    body = f"""  <div class="breadcrumbs">
     <div class="page-header d-flex align-items-center">
       <div class="container position-relative">
         <div class="row d-flex justify-content-center">
@@ -144,98 +81,124 @@ def generate_blogs_from_json(json_file):
      </div>
    </div>
  </section>
-</main>
-
-  <!-- Footer -->
-  <footer id="footer" class="footer-section">
-    <div class="container">
-      <div class="footer-content pt-5 pb-5">
-        <div class="row">
-          <div class="col-xl-4 col-lg-4 mb-50">
-            <div class="footer-widget">
-              <div class="footer-logo">
-                <a href="../index.html" class="logo d-flex align-items-center">
-                  <img src="../assets/images/Logo-new-2.png" alt="logo">
-                </a>
-              </div>
-              <div class="footer-text">
-                <p>BITS India specializes in delivering cutting-edge technology solutions across various domains, including application design, web development, surveillance, AI, cybersecurity, IoT, and smart systems. Our mission is to empower businesses with innovative tools and strategies that drive growth, efficiency, and security.
-                </p>
-              </div>
-
-              <div class="footer-social-icon">
-                <!-- <span>Follow us</span> -->
-                <a href="https://www.linkedin.com/in/bits-india/" target="_blank" class="linkedin"><i class="bi bi-linkedin"></i></a>
-              </div>
-
-            </div>
-          </div>
-                
-                <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
-                      <div class="service-widget footer-widget">
-                        <div class="footer-widget-heading">
-                            <h3>Services</h3>
-                        </div>
-                          <ul class="list">
-                              <li><a href="portfolio.html#all" class="filter-active">All</a></li>
-                              <li><a href="portfolio.html#application-design">Application Design</a></li>
-                              <li><a href="portfolio.html#web-designing">Web Designing</a></li>
-                              <li><a href="portfolio.html#surveillance-solutions">Surveillance Solutions</a></li>
-                              <li><a href="portfolio.html#ai-solutions">AI Solutions</a></li>
-                              <li><a href="portfolio.html#cybersecurity-solutions">Cybersecurity Solutions</a></li>
-                              <li><a href="portfolio.html#iot-smart-systems">IoT and Smart Systems</a></li>
-                              <li><a href="portfolio.html#ui-ux-designs">UI/UX Designs</a></li>
-                          </ul>
-                      </div>
-                  </div>
-                  <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
-                      <div class="service-widget footer-widget">
-                        <div class="footer-widget-heading">
-                            <h3>Information</h3>
-                        </div>
-                          <ul class="list">
-                            <li><a href="about.html">About</a></li>
-                            <li><a href="porfolio.html">Portfolio</a></li>
-                            <li><a href="faq.html">FAQs</a></li>
-                            <li><a href="blogs.html">Blogs</a></li>
-                            <li><a href="privacy-policy.html">Privacy Policy</a></li>
-                          </ul>
-                      </div>
-                  </div>
-                <div class="col-xl-4 col-lg-4 col-md-6 mb-50">
-                    <div class="contact-widget footer-widget">
-                        <div class="footer-widget-heading">
-                            <h3>Contacts</h3>
-                        </div>
-                          <div class="footer-text">
-                              <p><i class="bi bi-geo-alt-fill mr-15"></i> Shop No 10, Unity Splendour, Salunke Vihar Rd, Wanowrie, Pune, Maharashtra 411040</p>
-                              <p><i class="bi bi-telephone-inbound-fill mr-15"></i> +1 1234 56 789</p>
-                              <p><i class="bi bi-envelope-fill mr-15"></i> contact@bitsindia.in</p>
-                          </div>
-                    </div>
-                </div>
-            </div>
-            <div class="row">
-                <div class="col-xl-6 col-lg-6 text-left text-lg-left">
-                    <div class="copyright-text">
-                        <p>BITS India © 2024</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-  </footer>
-</body>
-</html>
-"""
+</main>"""
+
+    return layout.render(title=f"{title} - BITS India", description=description, keywords=keywords, body=body)
+
+def render_blog_feed(blogs, dates, site_url=SITE_URL):
+    """
+    Atom feed of the most recent posts; an entry's updated time is the
+    sitemap lastmod of its page
+    """
+    entries = []
+    for blog in sorted(blogs, key=lambda blog: blog['date'], reverse=True)[:FEED_ENTRIES]:
+        page_url = f"{site_url}blog/{blog['file_name']}.html"
+        published = f"{blog['date']}T00:00:00+00:00"
+        entries.append({
+            'id': page_url,
+            'title': blog['title'],
+            'link': page_url,
+            'published': published,
+            'updated': max(published, dates.lastmod(f"{blog['file_name']}.html")),
+            'summary': blog['description'],
+            'author': blog['author'],
+        })
+    return render_atom_feed("BITS India Blog", f"{site_url}blog/feed.xml", site_url, entries)
+
+def blog_search_document(blog):
+    return SearchDocument(
+        url=f"blog/{blog['file_name']}.html",
+        title=blog['title'],
+        summary=summarize(blog['description']),
+        fields={
+            'title': blog['title'],
+            'keywords': blog['keywords'],
+            'description': blog['description'],
+            'content': strip_tags(blog['content']),
+        },
+    )
+
+# JSON to HTML blog generator
+def generate_blogs_from_json(json_file, force=False, minify=False, critical_css=False, bundle_js=False, site_url=SITE_URL):
+    with stage("load_json", json_file), open(json_file, 'r') as file:
+        blogs = json.load(file)
 
-        # Write to file
-        with open(output_file, 'w') as f:
-            f.write(html_content)
-        print(f"Created: {output_file}")
+    # Pages are only rebuilt when their JSON entry or this template changed
+    manifest = BuildManifest(state_path("blog-manifest.json"))
+    # Posts load no scripts, as they never did, unless the bundle is asked for
+    script_bundle = build_bundle("blog") if bundle_js else ""
+    layout = site_layout.get_layout("../", minify=minify, script_bundle=script_bundle, scripts=bundle_js)
+    if critical_css and blogs:
+        # Every post shares one template, so the first post stands for all of them
+        sample = render_blog_page(blogs[0], layout)
+        layout = site_layout.get_layout("../", minify=minify, critical_css=extract_critical_css(sample),
+                                        script_bundle=script_bundle, scripts=bundle_js)
+    template_digest = record_digest(
+        {'minify': minify, 'critical_css': layout.critical_css, 'script_bundle': script_bundle},
+        source_digest(os.path.abspath(__file__), site_layout.__file__, site_minify.__file__),
+    )
 
-# JSON input file
-json_input_file = "blogs.json"
+    # Loop through each blog in the JSON file
+    for blog in blogs:
+        file_name = blog['file_name']
+
+        # Output file path
+        output_file = f"{file_name}.html"
 
-# Run the function
-generate_blogs_from_json(json_input_file)
\ No newline at end of file
+        # Skip if the page was already built from this exact entry and template
+        digest = record_digest(blog, template_digest)
+        if not force and manifest.is_current(output_file, digest):
+            continue
+
+        with stage("render", output_file):
+            page = render_blog_page(blog, layout)
+
+        # Write to file, leaving identical pages untouched
+        changed = write_if_changed(output_file, page)
+        manifest.update(output_file, digest)
+        print(f"Created: {output_file}" if changed else f"Unchanged: {output_file}")
+
+    manifest.prune(f"{blog['file_name']}.html" for blog in blogs)
+    manifest.save()
+
+    # Sitemap lastmod values and the feed only move when a page's content does
+    pages = [f"{blog['file_name']}.html" for blog in blogs]
+    dates = publish_sitemap("blog/", "posts", pages, state_path("sitemap-dates.json"), site_url)
+    if write_if_changed("feed.xml", render_blog_feed(blogs, dates, site_url)):
+        print("Feed updated: feed.xml")
+
+    publish_search_index("blog", [blog_search_document(blog) for blog in blogs], state_path("search-blog.json"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate blog post pages from a JSON file")
+    parser.add_argument('json_file', nargs='?', default="blogs.json", help="JSON input file")
+    parser.add_argument('--force', action='store_true', help="rebuild every page, even unchanged ones")
+    parser.add_argument('--minify', action='store_true', help="minify the generated HTML")
+    parser.add_argument('--critical-css', action='store_true', help="inline above-the-fold CSS and load stylesheets asynchronously")
+    parser.add_argument('--bundle-js', action='store_true',
+                        help="load the site's scripts as one deferred, minified bundle (by default none are loaded)")
+    parser.add_argument('--site-url', default=SITE_URL, help="public site address used in the sitemap and feed")
+    parser.add_argument('--report', metavar='PATH', help="write per-stage build timings to PATH as JSON")
+    parser.add_argument('--trace', metavar='PATH', help="write a Chrome trace-event timeline of the build to PATH")
+    parser.add_argument('--profile-memory', action='store_true', help="report peak memory per stage and the top allocation sites")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and rebuild changed posts and the blogs listing on save")
+    args = parser.parse_args()
+
+    with build_report(args.report, args.trace, args.profile_memory):
+        if args.watch:
+            # The listing pages are built from the same JSON, so they are rebuilt too
+            import generate_blogs_page as listing
+
+            def rebuild(changed):
+                # The manifests limit each rebuild to the pages whose entries changed
+                generate_blogs_from_json(args.json_file, minify=args.minify, critical_css=args.critical_css,
+                                         bundle_js=args.bundle_js, site_url=args.site_url)
+                listing.generate_blogs_page(args.json_file, "blogs.html", minify=args.minify,
+                                            critical_css=args.critical_css, bundle_js=args.bundle_js,
+                                            site_url=args.site_url)
+
+            watch(lambda: [args.json_file], rebuild, code_paths=code_files(__file__, listing.__file__))
+        else:
+            generate_blogs_from_json(args.json_file, force=args.force, minify=args.minify, critical_css=args.critical_css,
+                                     bundle_js=args.bundle_js, site_url=args.site_url)
\ No newline at end of file
@@ -1,80 +1,91 @@
+import argparse
+import io
 import json
 import os
+import posixpath
+import sys
 
-def generate_blogs_page(json_file, output_file):
-    with open(json_file, 'r') as file:
-        blogs = json.load(file)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sitegen import layout as site_layout
+from sitegen import minify as site_minify
+from sitegen.bundle import build_bundle
+from sitegen.critical import extract_critical_css
+from sitegen.layout import get_layout
+from sitegen.manifest import BuildManifest, record_digest, source_digest, state_path
+from sitegen.output import OutputFile
+from sitegen.sitemap import SITE_URL, publish_sitemap
+from sitegen.timing import build_report, stage
+
+# Write buffer for the listing page; chunks are flushed as they are produced
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Number of blog cards per listing page
+DEFAULT_PER_PAGE = 12
+
+
+def page_path(output_file, page):
+    """
+    Path of a listing page: the first page is output_file itself, later ones
+    live in <name>/page/<n>.html next to it
+    """
+    if page == 1:
+        return output_file
+    base, extension = posixpath.splitext(output_file)
+    return posixpath.join(base, "page", f"{page}{extension}")
+
+
+def relative_prefix(path):
+    """
+    Prefix leading from the folder of path back to the generator's folder
+    """
+    depth = posixpath.normpath(path).count("/")
+    return "../" * depth
 
-    # Base HTML structure for blogs.html
-    html_content = """
-<!DOCTYPE html>
-<html lang="en">
-
-  <head>
-  <meta charset="utf-8">
-  <meta content="width=device-width, initial-scale=1.0" name="viewport">
-
-  <title>BITS India - Business & IT Solutions - Innovating Defence & Commercial Technology</title>
-  <meta content="" name="BITS India - Business & IT Solutions | Innovating Defence & Commercial Technology">
-  <meta name="description" content="BITS India - Business & IT Solutions | Innovating Defence & Commercial Technology">
-
-  <meta name="keywords" content="Surveillance, CCTV, IOT"/>
-
-  <!-- Favicons -->
-  <link href="../assets/images/favicon.png" rel="icon">
-  <link href="../assets/images/apple-touch-icon.png" rel="apple-touch-icon">
-
-  <!-- Google Fonts -->
-  <link href="../../../css2?family=Open+Sans:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,600;1,700&amp;family=Montserrat:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;family=Raleway:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;display=swap" rel="stylesheet">
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin="">
-  <link href="../../../css2-1?family=Oswald:wght@500&amp;display=swap" rel="stylesheet">
-  <link href="../../../css2-2?family=Poppins:wght@300;400&amp;display=swap" rel="stylesheet">
-  <!-- Vendor CSS Files -->
-  <link href="../assets/vendor/aos/aos.css" rel="stylesheet">
-  <link href="../assets/stylesheets/font-awesome.min.css" rel="stylesheet">
-  <link href="../assets/vendor/swiper/swiper-bundle.min.css" rel="stylesheet">
-  <link href="../assets/vendor/glightbox/css/glightbox.min.css" rel="stylesheet">
-  <link href="../assets/vendor/bootstrap/css/bootstrap.min.css" rel="stylesheet">
-  <link href="../assets/vendor/bootstrap-icons/bootstrap-icons.css" rel="stylesheet">
-  <!-- Main CSS File -->
-  <link href="../assets/stylesheets/styles.css" rel="stylesheet">
-
-
-</head>
-
-<body>
-  <!-- Header -->
-  <header id="header" class="header d-flex align-items-center sticked stikcy-menu">
-    <div class="container-fluid container-xl d-flex align-items-center justify-content-between">
-      <a href="../index.html" class="logo d-flex align-items-center">
-        <img src="../assets/images/Logo-new.png" alt="logo">
-      </a>
-      <nav id="navbar" class="navbar">
-        <ul>
-          <li><a href="../index.html" class="">Home</a></li>
-          <li><a href="../services.html" class="">Services</a></li>
-          <li><a href="../portfolio.html" class="">Portfolio</a></li>
-          <li><a href="../testimonials.html" class="">Testimonials</a></li>
-          <!-- <li><a href="team.html" class="">Team</a></li> -->
-          <li class="dropdown"><a href="#"><span>Menu</span> <i class="bi bi-chevron-down dropdown-indicator"></i></a>
-            <ul>
-              <li><a href="../about.html">About</a></li>
-              <li><a href="../faqs.html">FAQs</a></li>
-              <li><a href="../privacy-policy.html">Privacy Policy</a></li>
-            </ul>
-          </li>
-          <li><a href="../blogs.html">Blogs</a></li>
-        </ul>
-      </nav><!-- .navbar -->
-      <a href="../contact.html" class="btn-get-started hide-on-mobile">Get Quotes</a>
-      <button id="darkmode-button"><i class="bi bi-moon-fill"></i></button>
-      <i class="mobile-nav-toggle mobile-nav-show bi bi-list"></i>
-      <i class="mobile-nav-toggle mobile-nav-hide d-none bi bi-x"></i>
-    </div>
-  </header>
-  <!-- End Header -->
 
+def rebase(url, prefix):
+    """
+    Make a URL written relative to the blog folder work from a deeper page
+    """
+    if not prefix or url.startswith(("/", "#")) or "://" in url:
+        return url
+    return prefix + url
+
+
+def iter_pagination(output_file, page, pages):
+    """
+    Yield the previous/next links for a listing page
+    """
+    if pages <= 1:
+        return
+    here = posixpath.dirname(page_path(output_file, page)) or "."
+
+    def href(target):
+        return posixpath.relpath(page_path(output_file, target), here)
+
+    yield """
+        <nav class="mt-5" aria-label="Blog pages">
+          <ul class="pagination justify-content-center">"""
+    if page > 1:
+        yield f"""
+            <li class="page-item"><a class="page-link" href="{href(page - 1)}" rel="prev">&laquo; Previous</a></li>"""
+    yield f"""
+            <li class="page-item disabled"><span class="page-link">Page {page} of {pages}</span></li>"""
+    if page < pages:
+        yield f"""
+            <li class="page-item"><a class="page-link" href="{href(page + 1)}" rel="next">Next &raquo;</a></li>"""
+    yield """
+          </ul>
+        </nav>"""
+
+
+def iter_blogs_body(blogs, output_file="blogs.html", page=1, pages=1):
+    """
+    Yield the listing page body one chunk at a time, so memory stays flat
+    however many posts there are
+    """
+    prefix = relative_prefix(page_path(output_file, page))
+    root = prefix + "../"
+    yield f"""
   <!-- Breadcrumbs -->
   <div class="breadcrumbs">
     <div class="page-header d-flex align-items-center">
@@ -90,7 +101,7 @@ def generate_blogs_page(json_file, output_file):
     <nav>
       <div class="container">
         <ol>
-          <li><a href="../index.html">Home</a></li>
+          <li><a href="{root}index.html">Home</a></li>
           <li>Our Blogs</li>
         </ol>
       </div>
@@ -106,9 +117,9 @@ def generate_blogs_page(json_file, output_file):
 
     # Loop through blogs to create dynamic blog cards
     for blog in blogs:
-        file_name = blog['file_name']
+        file_name = rebase(blog['file_name'], prefix)
         title = blog['title']
-        image_path = blog['image_path']
+        image_path = rebase(blog['image_path'], prefix)
         author = blog['author']
         date = blog['date']
         description = blog['description']
@@ -135,107 +146,109 @@ def generate_blogs_page(json_file, output_file):
             </article>
           </div>
         """
-        html_content += blog_card
+        yield blog_card
 
     # Close HTML structure
-    html_content += """
-        </div>
+    yield """
+        </div>"""
+    yield from iter_pagination(output_file, page, pages)
+    yield """
       </div>
     </section>
   </main>
 
-  <!-- Footer -->
-  <footer id="footer" class="footer-section">
-    <div class="container">
-      <div class="footer-content pt-5 pb-5">
-        <div class="row">
-          <div class="col-xl-4 col-lg-4 mb-50">
-            <div class="footer-widget">
-              <div class="footer-logo">
-                <a href="../index.html" class="logo d-flex align-items-center">
-                  <img src="../assets/images/Logo-new-2.png" alt="logo">
-                </a>
-              </div>
-              <div class="footer-text">
-                <p>BITS India specializes in delivering cutting-edge technology solutions across various domains, including application design, web development, surveillance, AI, cybersecurity, IoT, and smart systems. Our mission is to empower businesses with innovative tools and strategies that drive growth, efficiency, and security.
-                </p>
-              </div>
-
-              <div class="footer-social-icon">
-                <!-- <span>Follow us</span> -->
-                <a href="https://www.linkedin.com/in/bits-india/" target="_blank" class="linkedin"><i class="bi bi-linkedin"></i></a>
-              </div>
-
-            </div>
-          </div>
-                
-                <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
-                      <div class="service-widget footer-widget">
-                        <div class="footer-widget-heading">
-                            <h3>Services</h3>
-                        </div>
-                          <ul class="list">
-                              <li><a href="portfolio.html#all" class="filter-active">All</a></li>
-                              <li><a href="portfolio.html#application-design">Application Design</a></li>
-                              <li><a href="portfolio.html#web-designing">Web Designing</a></li>
-                              <li><a href="portfolio.html#surveillance-solutions">Surveillance Solutions</a></li>
-                              <li><a href="portfolio.html#ai-solutions">AI Solutions</a></li>
-                              <li><a href="portfolio.html#cybersecurity-solutions">Cybersecurity Solutions</a></li>
-                              <li><a href="portfolio.html#iot-smart-systems">IoT and Smart Systems</a></li>
-                              <li><a href="portfolio.html#ui-ux-designs">UI/UX Designs</a></li>
-                          </ul>
-                      </div>
-                  </div>
-                  <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
-                      <div class="service-widget footer-widget">
-                        <div class="footer-widget-heading">
-                            <h3>Information</h3>
-                        </div>
-                          <ul class="list">
-                            <li><a href="about.html">About</a></li>
-                            <li><a href="porfolio.html">Portfolio</a></li>
-                            <li><a href="faq.html">FAQs</a></li>
-                            <li><a href="blogs.html">Blogs</a></li>
-                            <li><a href="privacy-policy.html">Privacy Policy</a></li>
-                          </ul>
-                      </div>
-                  </div>
-                <div class="col-xl-4 col-lg-4 col-md-6 mb-50">
-                    <div class="contact-widget footer-widget">
-                        <div class="footer-widget-heading">
-                            <h3>Contacts</h3>
-                        </div>
-                          <div class="footer-text">
-                              <p><i class="bi bi-geo-alt-fill mr-15"></i> Shop No 10, Unity Splendour, Salunke Vihar Rd, Wanowrie, Pune, Maharashtra 411040</p>
-                              <p><i class="bi bi-telephone-inbound-fill mr-15"></i> +1 1234 56 789</p>
-                              <p><i class="bi bi-envelope-fill mr-15"></i> contact@bitsindia.in</p>
-                          </div>
-                    </div>
-                </div>
-            </div>
-            <div class="row">
-                <div class="col-xl-6 col-lg-6 text-left text-lg-left">
-                    <div class="copyright-text">
-                        <p>BITS India © 2024</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-  </footer>
-</body>
-</html>
 """
 
-    # Write the output to blogs.html
-    with open(output_file, 'w') as file:
-        file.write(html_content)
-    print(f"Generated: {output_file}")
 
+def write_blogs_page(blogs, stream, output_file="blogs.html", page=1, pages=1, minify=False, critical_css="",
+                     script_bundle=""):
+    """
+    Stream one complete listing page to a binary file-like object. The page
+    loads no scripts, as it never did, unless a script bundle is given.
+    """
+    prefix = relative_prefix(page_path(output_file, page))
+    title = "Our Blogs - BITS India" if page == 1 else f"Our Blogs - Page {page} - BITS India"
+    get_layout(prefix + "../", minify=minify, critical_css=critical_css, script_bundle=script_bundle,
+               scripts=bool(script_bundle)).write(
+        stream,
+        title=title,
+        keywords="Surveillance, CCTV, IOT",
+        body=iter_blogs_body(blogs, output_file, page, pages),
+    )
+
+
+def generate_blogs_page(json_file, output_file, per_page=DEFAULT_PER_PAGE, force=False, minify=False, critical_css=False,
+                        bundle_js=False, site_url=SITE_URL):
+    with stage("load_json", json_file), open(json_file, 'r') as file:
+        blogs = json.load(file)
 
-# Input and output paths
-json_file = "blogs.json"
-output_file = "blogs.html"
-
-# Run the function
-generate_blogs_page(json_file, output_file)
\ No newline at end of file
+    # Split the archive into shards; each is only rewritten when its posts,
+    # its position in the pagination or the template changed
+    per_page = per_page or max(len(blogs), 1)
+    pages = max((len(blogs) + per_page - 1) // per_page, 1)
+    manifest = BuildManifest(state_path("blogs-page-manifest.json"))
+
+    # The first listing page stands for every shard; its critical CSS is
+    # written relative to the site root, so it fits shards at any depth
+    script_bundle = build_bundle("blog") if bundle_js else ""
+    inline_css = ""
+    if critical_css:
+        sample = io.BytesIO()
+        write_blogs_page(blogs[:per_page], sample, output_file, 1, pages, script_bundle=script_bundle)
+        inline_css = extract_critical_css(sample.getvalue(), os.path.dirname(output_file) or ".")
+
+    template_digest = record_digest(
+        {'minify': minify, 'critical_css': inline_css, 'script_bundle': script_bundle},
+        source_digest(os.path.abspath(__file__), site_layout.__file__, site_minify.__file__),
+    )
+
+    written = []
+    for page in range(1, pages + 1):
+        shard = blogs[(page - 1) * per_page:page * per_page]
+        shard_file = page_path(output_file, page)
+        written.append(shard_file)
+
+        digest = record_digest({'page': page, 'pages': pages, 'blogs': shard}, template_digest)
+        if not force and manifest.is_current(shard_file, digest):
+            continue
+
+        # Write the output to blogs.html or its page shard, atomically and only if it changed.
+        # The page is streamed, so its render time includes writing to the temp file.
+        with OutputFile(shard_file, buffering=WRITE_BUFFER_SIZE) as file:
+            with stage("render", shard_file):
+                write_blogs_page(shard, file, output_file, page, pages, minify=minify, critical_css=inline_css,
+                                 script_bundle=script_bundle)
+        manifest.update(shard_file, digest)
+        print(f"Generated: {shard_file}" if file.changed else f"Unchanged: {shard_file}")
+
+    # Remove shards left over from a larger archive
+    for stale_file in set(manifest.entries) - set(written):
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+            print(f"Removed: {stale_file}")
+    manifest.prune(written)
+    manifest.save()
+
+    publish_sitemap("blog/", "listing", written, state_path("sitemap-dates.json"), site_url)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the paginated blogs listing from a JSON file")
+    parser.add_argument('json_file', nargs='?', default="blogs.json", help="JSON input file")
+    parser.add_argument('output_file', nargs='?', default="blogs.html", help="first listing page")
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE, help="blog cards per page (0 for a single page)")
+    parser.add_argument('--force', action='store_true', help="rewrite every page, even unchanged ones")
+    parser.add_argument('--minify', action='store_true', help="minify the generated HTML")
+    parser.add_argument('--critical-css', action='store_true', help="inline above-the-fold CSS and load stylesheets asynchronously")
+    parser.add_argument('--bundle-js', action='store_true',
+                        help="load the site's scripts as one deferred, minified bundle (by default none are loaded)")
+    parser.add_argument('--site-url', default=SITE_URL, help="public site address used in the sitemap")
+    parser.add_argument('--report', metavar='PATH', help="write per-stage build timings to PATH as JSON")
+    parser.add_argument('--trace', metavar='PATH', help="write a Chrome trace-event timeline of the build to PATH")
+    parser.add_argument('--profile-memory', action='store_true', help="report peak memory per stage and the top allocation sites")
+    args = parser.parse_args()
+
+    with build_report(args.report, args.trace, args.profile_memory):
+        generate_blogs_page(args.json_file, args.output_file, per_page=args.per_page, force=args.force,
+                            minify=args.minify, critical_css=args.critical_css, bundle_js=args.bundle_js,
+                            site_url=args.site_url)
@@ -1,7 +1,13 @@
+import argparse
 import json
 import os
 from PIL import Image
 
+from sitegen.images import VARIANT_WIDTHS, ImageJob, reduce_for_target, responsive_attrs, run_image_jobs, save_with_variants
+from sitegen.output import write_if_changed
+from sitegen.scan import list_files
+from sitegen.timing import build_report, stage
+
 def resize_and_pad_image(image_path, output_path, size=(800, 600)):
     """
     Resize and pad images with improved dimensions and 4:3 aspect ratio
@@ -14,8 +20,10 @@ def resize_and_pad_image(image_path, output_path, size=(800, 600)):
     # [Previous image processing code remains unchanged]
     try:
         with Image.open(image_path) as img:
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+            with stage("image_decode", image_path):
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                img.load()
             
             aspect = img.width / img.height
             target_aspect = 4/3
@@ -27,38 +35,45 @@ def resize_and_pad_image(image_path, output_path, size=(800, 600)):
                 new_height = size[1]
                 new_width = int(size[1] * target_aspect)
             
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            new_img = Image.new('RGB', size, (248, 249, 250))
+            with stage("image_resize", image_path):
+                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                new_img = Image.new('RGB', size, (248, 249, 250))
             
             x = (size[0] - new_width) // 2
             y = (size[1] - new_height) // 2
             
             new_img.paste(img, (x, y))
-            new_img.save(output_path, quality=95, optimize=True)
+            with stage("image_encode", image_path):
+                new_img.save(output_path, quality=95, optimize=True)
     except Exception as e:
         print(f"Error processing image {image_path}: {e}")
 
-def resize_and_maintain_ratio(image_path, output_path, max_size=(800, 600)):
+def resize_and_maintain_ratio(image_path, output_path, max_size=(800, 600), widths=()):
     """
     Resize image maintaining original ratio and place on white background
     """
     # [Previous ratio maintenance code remains unchanged]
     try:
         with Image.open(image_path) as img:
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+            with stage("image_decode", image_path):
+                # Let the decoder downscale large sources before converting
+                img = reduce_for_target(img, max_size)
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                img.load()
             
             ratio = min(max_size[0]/img.width, max_size[1]/img.height)
             new_size = (int(img.width * ratio), int(img.height * ratio))
             
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
+            with stage("image_resize", image_path):
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
             background = Image.new('RGB', max_size, (255, 255, 255))
             
             x = (max_size[0] - new_size[0]) // 2
             y = (max_size[1] - new_size[1]) // 2
             
             background.paste(img, (x, y))
-            background.save(output_path, quality=95, optimize=True)
+            save_with_variants(background, output_path, widths, label=image_path, quality=95, optimize=True)
     except Exception as e:
         print(f"Error processing image {image_path}: {e}")
 
@@ -180,11 +195,31 @@ def generate_portfolio_css():
     }
     """
 
-def generate_html(json_file, output_file):
+def generate_html(json_file, output_file, workers=None):
     # Load project data
-    with open(json_file, 'r') as file:
+    with stage("load_json", json_file), open(json_file, 'r') as file:
         projects = json.load(file)
 
+    # Image stage: resize every project's first image in parallel before rendering
+    image_jobs = []
+    cover_images = {}
+    for project in projects:
+        # Process images
+        image_folder = os.path.join("portfolio", project['image_folder'])
+        resized_folder = os.path.join(image_folder, "resized")
+        os.makedirs(resized_folder, exist_ok=True)
+
+        # Handle images
+        images = list_files(image_folder, ('.png', '.jpg', '.jpeg'))
+        if images:
+            main_image = images[0]
+            original_path = os.path.join(image_folder, main_image)
+            resized_path = os.path.join(resized_folder, main_image)
+            image_jobs.append(ImageJob(resize_and_maintain_ratio, original_path, resized_path, {'widths': VARIANT_WIDTHS}))
+            cover_images[project['file_name']] = resized_path
+
+    run_image_jobs(image_jobs, workers=workers)
+
     # Start HTML content
     html_content = '''<!DOCTYPE html>
 <html lang="en">
@@ -291,25 +326,14 @@ def generate_html(json_file, output_file):
     # Generate portfolio items with links to dedicated pages
     for project in projects:
         category_class = project['project_category'].lower().replace(' ', '-')
-        
-        # Process images
-        image_folder = os.path.join("portfolio", project['image_folder'])
-        resized_folder = os.path.join(image_folder, "resized")
-        os.makedirs(resized_folder, exist_ok=True)
 
-        # Handle images
-        images = [img for img in os.listdir(image_folder) if img.endswith(('.png', '.jpg', '.jpeg'))]
-        if images:
-            main_image = images[0]
-            original_path = os.path.join(image_folder, main_image)
-            resized_path = os.path.join(resized_folder, main_image)
-            resize_and_maintain_ratio(original_path, resized_path)
-            
+        resized_path = cover_images.get(project['file_name'])
+        if resized_path:
             # Generate portfolio item HTML with link to dedicated page
             html_content += f'''
                 <div class="custom-portfolio-card {category_class}" data-aos="fade-up" data-aos-delay="100">
                     <a href="portfolio/{project['file_name']}" class="custom-portfolio-link">
-                        <img src="{resized_path}" class="img-fluid" alt="{project['project_name']}">
+                        <img src="{resized_path}"{responsive_attrs(resized_path, "(max-width: 768px) 100vw, 33vw")} class="img-fluid" alt="{project['project_name']}">
                         <div class="custom-portfolio-details">
                             <h3>{project['project_name']}</h3>
                             <p>{project['project_category']}</p>
@@ -433,11 +457,18 @@ def generate_html(json_file, output_file):
     '''
 
     # Write the final HTML to file
-    with open(output_file, 'w') as file:
-        file.write(html_content)
+    write_if_changed(output_file, html_content)
 
 # Usage remains the same
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the portfolio grid page")
+    parser.add_argument('--workers', type=int, default=None, help="image worker processes (default: CPU count)")
+    parser.add_argument('--report', metavar='PATH', help="write per-stage build timings to PATH as JSON")
+    parser.add_argument('--trace', metavar='PATH', help="write a Chrome trace-event timeline of the build to PATH")
+    parser.add_argument('--profile-memory', action='store_true', help="report peak memory per stage and the top allocation sites")
+    args = parser.parse_args()
+
     json_file = 'portfolio/projects.json'
     output_file = 'portfolio.html'
-    generate_html(json_file, output_file)
\ No newline at end of file
+    with build_report(args.report, args.trace, args.profile_memory):
+        generate_html(json_file, output_file, workers=args.workers)
\ No newline at end of file
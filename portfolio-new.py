@@ -1,102 +1,66 @@
+import argparse
 import json
 import os
 from PIL import Image
 
-def optimize_image(image_path, output_path, max_dimension=1200):
+from sitegen.images import VARIANT_WIDTHS, ImageJob, reduce_for_target, responsive_attrs, run_image_jobs, save_with_variants
+from sitegen.layout import get_layout
+from sitegen.output import write_if_changed
+from sitegen.scan import IMAGE_EXTENSIONS, list_files
+from sitegen.timing import build_report, stage
+
+def optimize_image(image_path, output_path, max_dimension=1200, widths=()):
     """
     Optimize image while maintaining aspect ratio
     Only resize if image is too large, focus on quality optimization
     """
     try:
         with Image.open(image_path) as img:
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+            with stage("image_decode", image_path):
+                # Let the decoder downscale large sources before converting
+                img = reduce_for_target(img, (max_dimension, max_dimension))
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                img.load()
             
             # Calculate new size while maintaining aspect ratio
             ratio = min(max_dimension/max(img.width, img.height), 1.0)
             if ratio < 1.0:  # Only resize if image is too large
                 new_size = (int(img.width * ratio), int(img.height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+                with stage("image_resize", image_path):
+                    img = img.resize(new_size, Image.Resampling.LANCZOS)
             
             # Save with optimization
-            img.save(output_path, 'WEBP', quality=85, optimize=True)
+            save_with_variants(img, output_path, widths, label=image_path, format='WEBP', quality=85, optimize=True)
     except Exception as e:
         print(f"Error processing image {image_path}: {e}")
 
-def generate_html(json_file, output_file):
+def generate_html(json_file, output_file, workers=None):
     # Load project data
-    with open(json_file, 'r') as file:
+    with stage("load_json", json_file), open(json_file, 'r') as file:
         projects = json.load(file)
 
-    # Start HTML content
-    html_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="utf-8">
-    <meta content="width=device-width, initial-scale=1.0" name="viewport">
-    <title>BITS India - Business & IT Solution</title>
-    <meta content="" name="BITS India - Business & IT Solution">
-    <meta name="description" content="BITS India - Business & IT Solution">
-    <meta http-equiv="X-UA-Compatible" content="ie=edge">
-    
-    
-    <!-- Favicons -->
-    <link href="assets/images/favicon.png" rel="icon">
-    <link href="assets/images/apple-touch-icon.png" rel="apple-touch-icon">
-    
-    <!-- Google Fonts -->
-    <link href="../../../css2?family=Open+Sans:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,600;1,700&amp;family=Montserrat:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;family=Raleway:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;display=swap" rel="stylesheet">
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin="">
-    <link href="../../../css2-1?family=Oswald:wght@500&amp;display=swap" rel="stylesheet">
-    <link href="../../../css2-2?family=Poppins:wght@300;400&amp;display=swap" rel="stylesheet">
-    
-    <!-- Vendor CSS Files -->
-    <link href="assets/vendor/bootstrap/css/bootstrap.min.css" rel="stylesheet">
-    <link href="assets/vendor/bootstrap-icons/bootstrap-icons.css" rel="stylesheet">
-    <link href="assets/stylesheets/font-awesome.min.css" rel="stylesheet">
-    <link href="assets/vendor/swiper/swiper-bundle.min.css" rel="stylesheet">
-    <link href="assets/vendor/glightbox/css/glightbox.min.css" rel="stylesheet">
-    
-    <!-- Main CSS -->
-    <link href="assets/stylesheets/styles.css" rel="stylesheet">
+    # Image stage: optimize every cover in parallel before rendering
+    image_jobs = []
+    cover_images = {}
+    for project in projects:
+        # Process images
+        image_folder = os.path.join("portfolio", project['image_folder'])
+        resized_folder = os.path.join(image_folder, "resized")
+        os.makedirs(resized_folder, exist_ok=True)
 
-</head>
-<body>
-    <!-- Header -->
-  <header id="header" class="header d-flex align-items-center sticked stikcy-menu">
-    <div class="container-fluid container-xl d-flex align-items-center justify-content-between">
-      <a href="index.html" class="logo d-flex align-items-center">
-        <img src="assets/images/Logo-new.png" alt="logo">
-      </a>
-      <nav id="navbar" class="navbar">
-        <ul>
-          <li><a href="index.html" class="">Home</a></li>
-          <li><a href="services.html" class="">Services</a></li>
-          <li><a href="portfolio.html" class="">Portfolio</a></li>
-          <li><a href="testimonials.html" class="">Testimonials</a></li>
-          <!-- <li><a href="team.html" class="">Team</a></li> -->
-          <li class="dropdown"><a href="#"><span>Menu</span> <i class="bi bi-chevron-down dropdown-indicator"></i></a>
-            <ul>
-              <li><a href="about.html">About</a></li>
-              <li><a href="packages.html">Pricing</a></li>
-              <li><a href="faqs.html">FAQs</a></li>
-              <!-- <li><a href="privacy-policy.html">Terms &amp; Conditions</a></li> -->
-              <li><a href="privacy-policy.html">Privacy Policy</a></li>
-              <li><a href="blogs.html">Blogs</a></li>
-              <!-- <li><a href="blog-details.html">Blog Detail Page</a></li> -->
-            </ul>
-          </li>
-          <li><a href="blogs.html">News</a></li>
-        </ul>
-      </nav><!-- .navbar -->
-      <a href="contact.html" class="btn-get-started hide-on-mobile">Get Quotes</a>
-      <button id="darkmode-button"><i class="bi bi-moon-fill"></i></button>
-      <i class="mobile-nav-toggle mobile-nav-show bi bi-list"></i>
-      <i class="mobile-nav-toggle mobile-nav-hide d-none bi bi-x"></i>
-    </div>
-  </header>
+        # Handle images
+        images = list_files(image_folder, IMAGE_EXTENSIONS)
+        main_image = 'cover.webp' if 'cover.webp' in images else images[0]
+        original_path = os.path.join(image_folder, main_image)
+        resized_path = os.path.join(resized_folder, f"optimized_{main_image}")
+        image_jobs.append(ImageJob(optimize_image, original_path, resized_path, {'widths': VARIANT_WIDTHS}))
+        cover_images[project['file_name']] = resized_path
 
+    run_image_jobs(image_jobs, workers=workers)
+
+    # Page body; head, header and footer come from the shared layout
+    html_content = '''
     <!-- Breadcrumbs -->
     <div class="breadcrumbs">
         <div class="page-header d-flex align-items-center">
@@ -139,27 +103,14 @@ def generate_html(json_file, output_file):
     # Generate portfolio items
     for project in projects:
         category_class = project['project_category'].lower().replace(' ', '-')
-        
-        # Process images
-        image_folder = os.path.join("portfolio", project['image_folder'])
-        resized_folder = os.path.join(image_folder, "resized")
-        os.makedirs(resized_folder, exist_ok=True)
+        resized_path = cover_images[project['file_name']]
 
-        # Handle images
-
-        # In the generate_html function, update the image processing section:
-        images = [img for img in os.listdir(image_folder) if img.endswith(('.png', '.jpg', '.jpeg', '.webp'))]
-        main_image = 'cover.webp' if 'cover.webp' in images else images[0]
-        original_path = os.path.join(image_folder, main_image)
-        resized_path = os.path.join(resized_folder, f"optimized_{main_image}")
-        optimize_image(original_path, resized_path)
-        
         # In the generate_html function, update the portfolio item HTML generation:
         html_content += f'''
             <div class="custom-portfolio-card {category_class}" data-aos="fade-up" data-aos-delay="100">
                 <a href="portfolio/{project['file_name']}" class="custom-portfolio-link">
                     <div class="image-container">
-                        <img src="{resized_path}" class="img-fluid" alt="{project['project_name']}">
+                        <img src="{resized_path}"{responsive_attrs(resized_path, "(max-width: 768px) 100vw, 33vw")} class="img-fluid" alt="{project['project_name']}">
                     </div>
                     <div class="custom-portfolio-details">
                         <h3>{project['project_name']}</h3>
@@ -175,108 +126,10 @@ def generate_html(json_file, output_file):
         </div>
     </section>
 
-    <!-- Footer -->
-
-      <footer id="footer" class="footer-section">
-        <div class="container">
-        <div class="footer-content pt-5 pb-5">
-            <div class="row">
-            <div class="col-xl-4 col-lg-4 mb-50">
-                <div class="footer-widget">
-                <div class="footer-logo">
-                    <a href="index.html" class="logo d-flex align-items-center">
-                    <img src="assets/images/Logo-new-2.png" alt="logo">
-                    </a>
-                </div>
-                <div class="footer-text">
-                    <p>Lorem ipsum dolor sit amet, consec tetur adipisicing elit, sed do eiusmod tempor incididuntut consec
-                    tetur adipisicing
-                    elit,Lorem ipsum dolor sit amet.</p>
-                </div>
-                <div class="footer-social-icon">
-                    <span>Follow us</span>
-                    <a href="#" class="twitter"><i class="bi bi-twitter"></i></a>
-                    <a href="#" class="facebook"><i class="bi bi-facebook"></i></a>
-                    <a href="#" class="instagram"><i class="bi bi-instagram"></i></a>
-                    <a href="#" class="linkedin"><i class="bi bi-linkedin"></i></a>
-                </div>
-                </div>
-            </div>
-
-            <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
-                <div class="service-widget footer-widget">
-                <div class="footer-widget-heading">
-                    <h3>Services</h3>
-                </div>
-                <ul class="list">
-                    <li><a href="services.html">Web Design</a></li>
-                    <li><a href="services.html">App Developemnt</a></li>
-                    <li><a href="services.html">Cloud Services</a></li>
-                    <li><a href="services.html">Domain adn Hosting</a></li>
-                    <li><a href="services.html">Seo Optimization</a></li>
-                    <li><a href="services.html">Social Media</a></li>
-                </ul>
-                </div>
-            </div>
-            <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
-                <div class="service-widget footer-widget">
-                <div class="footer-widget-heading">
-                    <h3>Information</h3>
-                </div>
-                <ul class="list">
-                    <li><a href="about.html">About</a></li>
-                    <!-- <li><a href="packages.html">Pricing</a></li> -->
-                    <!-- <li><a href="team.html">Team</a></li> -->
-                    <li><a href="porfolio.html">Portfolio</a></li>
-                    <li><a href="faq.html">FAQs</a></li>
-                    <!-- <li><a href="team.html">Team</a></li> -->
-                    <li><a href="blogs.html">Blogs</a></li>
-                    <!-- <li><a href="blogs-details.html">Blog Details</a></li> -->
-                    <!-- <li><a href="coming-soon.html">Coming Soon</a></li> -->
-                    <li><a href="privacy-policy.html">Terms & Conditions</a></li>
-                    <li><a href="privacy-policy.html">Privacy Policy</a></li>
-                </ul>
-                </div>
-            </div>
-            <div class="col-xl-4 col-lg-4 col-md-6 mb-50">
-                <div class="contact-widget footer-widget">
-                <div class="footer-widget-heading">
-                    <h3>Contacts</h3>
-                </div>
-                <div class="footer-text">
-                    <p><i class="bi bi-geo-alt-fill mr-15"></i> 101 West Town , PBO 12345, United States</p>
-                    <p><i class="bi bi-telephone-inbound-fill mr-15"></i> +1 1234 56 789</p>
-                    <p><i class="bi bi-envelope-fill mr-15"></i> contact@example.com</p>
-                </div>
-                </div>
-                <div class="footer-widget">
-                <div class="footer-widget-heading">
-                    <h3>Newsletter</h3>
-                </div>
-                <div class="footer-text mb-25">
-                    <p>Don't miss to subscribe to our new feeds, kindly fill the form below.</p>
-                </div>
-                <div class="subscribe-form">
-                    <form action="#">
-                    <input type="text" placeholder="Email Address">
-                    <button><i class="bi bi-telegram"></i></button>
-                    </form>
-                </div>
-                </div>
-            </div>
-            </div>
-            <div class="row">
-            <div class="col-xl-6 col-lg-6 text-left text-lg-left">
-                <div class="copyright-text">
-                <p>BITS India © 2025 - Business & IT Solutions
-                </p>
-                </div>
-            </div>
-            </div>
-        </div>
-        </div>
-    </footer>
+'''
 
+    # Client-side category filter
+    filter_script = '''
     <!-- Filter script -->
     <script>
     document.addEventListener('DOMContentLoaded', function() {
@@ -331,15 +184,27 @@ def generate_html(json_file, output_file):
     });
     </script>
 
-    </body>
-    </html>'''
+'''
 
     # Write the final HTML to file
-    with open(output_file, 'w') as file:
-        file.write(html_content)
+    with stage("render", output_file):
+        page = get_layout("").render(
+            title="Our Portfolio - BITS India",
+            body=html_content,
+            scripts=filter_script,
+        )
+    write_if_changed(output_file, page)
 
 # Usage remains the same
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the portfolio grid page")
+    parser.add_argument('--workers', type=int, default=None, help="image worker processes (default: CPU count)")
+    parser.add_argument('--report', metavar='PATH', help="write per-stage build timings to PATH as JSON")
+    parser.add_argument('--trace', metavar='PATH', help="write a Chrome trace-event timeline of the build to PATH")
+    parser.add_argument('--profile-memory', action='store_true', help="report peak memory per stage and the top allocation sites")
+    args = parser.parse_args()
+
     json_file = 'portfolio/projects.json'
     output_file = 'portfolio.html'
-    generate_html(json_file, output_file)
\ No newline at end of file
+    with build_report(args.report, args.trace, args.profile_memory):
+        generate_html(json_file, output_file, workers=args.workers)
\ No newline at end of file
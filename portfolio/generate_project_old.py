@@ -1,7 +1,12 @@
 import json
 import os
+import sys
 from PIL import Image
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sitegen.output import write_if_changed
+from sitegen.scan import IMAGE_EXTENSIONS, list_files
+
 def resize_and_pad_image(image_path, output_path, size=(816, 582), padding=10):
     """
     Resize and pad an image while maintaining aspect ratio
@@ -83,8 +88,8 @@ def generate_portfolio_pages(json_file):
             os.makedirs(resized_folder, exist_ok=True)
 
             # Process images
-            images = [img for img in os.listdir(image_folder) 
-                     if img.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))]
+            images = [img for img in list_files(image_folder) 
+                     if img.lower().endswith(IMAGE_EXTENSIONS)]
             
             if not images:
                 print(f"Warning: No images found in {image_folder}")
@@ -108,7 +113,7 @@ def generate_portfolio_pages(json_file):
             related_html = ""
             for rel in related_projects:
                 rel_image_folder = os.path.join(rel['image_folder'], "resized")
-                rel_images = [f for f in os.listdir(rel_image_folder) 
+                rel_images = [f for f in list_files(rel_image_folder) 
                             if f.startswith("resized_")] if os.path.exists(rel_image_folder) else []
                 
                 if rel_images:
@@ -305,10 +310,10 @@ def generate_portfolio_pages(json_file):
             # os.makedirs(os.path.dirname(file_name), exist_ok=True)
 
             # Write the HTML file
-            with open(file_name, 'w', encoding='utf-8') as page_file:
-                page_file.write(html_content)
-            
-            print(f"Successfully generated: {file_name}")
+            if write_if_changed(file_name, html_content):
+                print(f"Successfully generated: {file_name}")
+            else:
+                print(f"Unchanged: {file_name}")
 
     except Exception as e:
         print(f"Error generating portfolio pages: {e}")
@@ -0,0 +1,3 @@
+"""
+Shared build helpers for the BITS India site generators
+"""
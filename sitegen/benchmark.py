@@ -0,0 +1,292 @@
+# Generator throughput benchmark: synthesizes blogs.json / projects.json
+# corpora (with image folders) of the requested sizes in a temporary site,
+# runs each generator there in a fresh process and reports pages/sec,
+# images/sec, peak RSS and bytes written as JSON.
+#
+#   python -m sitegen.benchmark --sizes 10 1000 --output bench.json   (from the repository root)
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from PIL import Image
+
+from sitegen.manifest import STATE_DIR
+from sitegen.server import ROOT, load_script, working_directory
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+
+# Generators that only process each project's cover, not its whole folder
+COVER_ONLY = ('portfolio_grid',)
+
+# name -> (script, function, folder it runs in, input it reads)
+GENERATORS = {
+    'blog_posts': ("blog/generate_blog.py", 'generate_blogs_from_json', "blog", 'blogs'),
+    'blog_listing': ("blog/generate_blogs_page.py", 'generate_blogs_page', "blog", 'blogs'),
+    'portfolio_pages': ("portfolio/generate_project.py", 'generate_portfolio_pages', "portfolio", 'projects'),
+    'portfolio_grid': ("portfolio-new.py", 'generate_html', ".", 'projects'),
+}
+
+# Source images per synthetic project, and their size (larger than every
+# target, so each one is actually resized)
+DEFAULT_IMAGES_PER_PROJECT = 2
+DEFAULT_IMAGE_SIZE = (1200, 900)
+
+WORDS = """
+    analytics automation business camera cloud compliance control dashboard data deployment detection device
+    digital edge energy enterprise facial fleet gateway grid industrial infrastructure integration intelligence
+    learning logistics machine maritime monitoring network operations platform predictive privacy real-time
+    recognition reliability remote scalable security sensor smart software surveillance sustainable system
+    tracking traffic transformation vision workflow
+""".split()
+CATEGORIES = ["AI Solutions", "IoT Solutions", "Surveillance", "Software Development", "Cloud Services"]
+
+
+def _sentence(rng, words=12):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def synthesize_blogs(count, seed=0):
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    blogs = []
+    for number in range(count):
+        paragraphs = "\n".join(f"<p>{' '.join(_sentence(rng) for _ in range(5))}</p>" for _ in range(6))
+        blogs.append({
+            'file_name': f"post-{number:06d}",
+            'title': _sentence(rng, 6)[:-1],
+            'description': _sentence(rng, 20),
+            'image_path': f"../assets/images/blog/blog-{number % 3 + 1}.jpg",
+            'author': "BITS India",
+            'date': (start + timedelta(days=number % 2000)).isoformat(),
+            'keywords': ", ".join(rng.sample(WORDS, 4)),
+            'content': f"<h3>{_sentence(rng, 5)[:-1]}</h3>\n{paragraphs}",
+        })
+    return blogs
+
+
+def synthesize_projects(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'project_name': _sentence(rng, 4)[:-1],
+        'project_category': CATEGORIES[number % len(CATEGORIES)],
+        'description': _sentence(rng, 30),
+        'pointers': [_sentence(rng, 8) for _ in range(4)],
+        'image_folder': f"project-{number:06d}",
+        'file_name': f"project-{number:06d}.html",
+    } for number in range(count)]
+
+
+def _sample_jpeg(size):
+    gradient = Image.linear_gradient('L').resize(size)
+    image = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.ROTATE_180), gradient.point(lambda v: 255 - v)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def write_image_folders(folder, projects, images_per_project, image_size):
+    """
+    Give every project its own image folder. The images share one encoded
+    picture, but each carries a distinct JPEG comment so the content-addressed
+    image cache sees a different source every time, as it would on a real site.
+    """
+    sample = _sample_jpeg(image_size)
+    written = 0
+    for project in projects:
+        image_folder = os.path.join(folder, project['image_folder'])
+        os.makedirs(image_folder, exist_ok=True)
+        for number in range(images_per_project):
+            comment = f"{project['image_folder']}/{number}".encode('ascii')
+            segment = b"\xff\xfe" + (len(comment) + 2).to_bytes(2, 'big') + comment
+            with open(os.path.join(image_folder, f"image-{number:02d}.jpg"), 'wb') as file:
+                # The comment goes right after the start-of-image marker
+                file.write(sample[:2] + segment + sample[2:])
+            written += 1
+    return written
+
+
+def prepare_site(site, generator, size, images_per_project, image_size):
+    """
+    Lay out a synthetic site for one generator run. Returns the number of
+    source images written.
+    """
+    kind = GENERATORS[generator][3]
+    if kind == 'blogs':
+        folder = os.path.join(site, "blog")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "blogs.json"), 'w', encoding='utf-8') as file:
+            json.dump(synthesize_blogs(size), file)
+        return 0
+    folder = os.path.join(site, "portfolio")
+    os.makedirs(folder)
+    projects = synthesize_projects(size)
+    with open(os.path.join(folder, "projects.json"), 'w', encoding='utf-8') as file:
+        json.dump(projects, file)
+    return write_image_folders(folder, projects, images_per_project, image_size)
+
+
+def _tree_size(site, skip=()):
+    # Build state (manifests, the image cache) is not site output
+    total = 0
+    files = 0
+    pages = 0
+    for folder, dirs, names in os.walk(site):
+        dirs[:] = [name for name in dirs if name != STATE_DIR]
+        for name in names:
+            path = os.path.join(folder, name)
+            if path in skip:
+                continue
+            total += os.path.getsize(path)
+            files += 1
+            pages += name.endswith('.html')
+    return total, files, pages
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS; children is the
+    # largest image worker
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * (1 if sys.platform == 'darwin' else 1024)
+
+
+def _call(generator, module, workers):
+    function = getattr(module, GENERATORS[generator][1])
+    if generator == 'blog_posts':
+        function("blogs.json")
+    elif generator == 'blog_listing':
+        function("blogs.json", "blogs.html")
+    elif generator == 'portfolio_pages':
+        function("projects.json", workers=workers)
+    else:
+        function("portfolio/projects.json", "portfolio.html", workers=workers)
+
+
+def run_case(generator, site, workers=None):
+    """
+    Run one generator over a prepared site, twice: a cold build, then a
+    rebuild with nothing changed. Meant to run in its own process, so the
+    peak RSS is that of this generator alone.
+    """
+    script, _, folder, _ = GENERATORS[generator]
+    module = load_script(os.path.join(ROOT, script))
+    inputs = {os.path.join(dirpath, name) for dirpath, _, names in os.walk(site) for name in names}
+
+    # Progress lines go nowhere; buffering them would count against peak RSS
+    with working_directory(os.path.join(site, folder)), open(os.devnull, 'w') as quiet, \
+            contextlib.redirect_stdout(quiet):
+        start = time.perf_counter()
+        _call(generator, module, workers)
+        seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        _call(generator, module, workers)
+        noop_seconds = time.perf_counter() - start
+
+    bytes_written, files_written, pages = _tree_size(site, skip=inputs)
+    return {
+        'seconds': seconds,
+        'noop_seconds': noop_seconds,
+        'pages': pages,
+        'files_written': files_written,
+        'bytes_written': bytes_written,
+        'peak_rss_bytes': _peak_rss(),
+    }
+
+
+def benchmark(generator, size, images_per_project=DEFAULT_IMAGES_PER_PROJECT, image_size=DEFAULT_IMAGE_SIZE,
+              workers=None):
+    site = tempfile.mkdtemp(prefix=f"sitegen-bench-{generator}-")
+    try:
+        start = time.perf_counter()
+        images = prepare_site(site, generator, size, images_per_project, image_size)
+        if generator in COVER_ONLY:
+            images = min(images, size)
+        setup_seconds = time.perf_counter() - start
+
+        command = [sys.executable, "-m", "sitegen.benchmark", "--run-case", generator, site]
+        if workers:
+            command += ["--workers", str(workers)]
+        completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            return {'generator': generator, 'entries': size, 'error': completed.stderr.strip().splitlines()[-1:]}
+        result = json.loads(completed.stdout)
+    finally:
+        shutil.rmtree(site, ignore_errors=True)
+
+    seconds = result['seconds']
+    return {
+        'generator': generator,
+        'entries': size,
+        'images': images,
+        'setup_seconds': round(setup_seconds, 3),
+        'seconds': round(seconds, 3),
+        'noop_seconds': round(result['noop_seconds'], 3),
+        'pages': result['pages'],
+        'pages_per_second': round(result['pages'] / seconds, 1) if seconds else None,
+        'images_per_second': round(images / seconds, 1) if images and seconds else None,
+        'files_written': result['files_written'],
+        'bytes_written': result['bytes_written'],
+        'peak_rss_bytes': result['peak_rss_bytes'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure generator throughput on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="corpus sizes (entries)")
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS),
+                        help="generators to run (default: all)")
+    parser.add_argument('--images-per-project', type=int, default=DEFAULT_IMAGES_PER_PROJECT,
+                        help="source images in each synthetic project folder")
+    parser.add_argument('--image-size', type=int, nargs=2, default=DEFAULT_IMAGE_SIZE, metavar=('WIDTH', 'HEIGHT'),
+                        help="size of the synthetic source images")
+    parser.add_argument('--workers', type=int, default=None, help="image worker processes (default: CPU count)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--run-case', nargs=2, metavar=('GENERATOR', 'SITE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(*args.run_case, workers=args.workers)))
+        return
+
+    results = []
+    for size in args.sizes:
+        for generator in args.generators:
+            result = benchmark(generator, size, args.images_per_project, tuple(args.image_size), args.workers)
+            print(f"{generator} x {size}: {result.get('seconds', 'failed')} s", file=sys.stderr)
+            results.append(result)
+
+    report = json.dumps({
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'results': results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
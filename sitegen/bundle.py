@@ -0,0 +1,122 @@
+import hashlib
+import os
+import re
+
+from sitegen.output import write_if_changed
+
+BUNDLE_DIR = "assets/bundles"
+
+# What the generated pages need. main.js initialises PureCounter, GLightbox,
+# Swiper and AOS unconditionally, so those libraries stay; nothing on these
+# pages uses jQuery or Bootstrap's JS, and the particles, validator and
+# contact form scripts only serve index.html and contact.html.
+PAGE_SCRIPTS = (
+    "assets/vendor/glightbox/js/glightbox.min.js",
+    "assets/vendor/aos/aos.js",
+    "assets/vendor/swiper/swiper-bundle.min.js",
+    "assets/javascripts/purecounter_vanilla.js",
+)
+
+# Always last: its top level throws on pages without the contact form, which
+# would stop anything concatenated after it
+MAIN_SCRIPT = "assets/javascripts/main.js"
+
+# Hex digits of the content hash put in the bundle's file name
+HASH_LENGTH = 10
+
+JS_TOKEN_PATTERN = re.compile(r"""
+    (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+  | (?P<license>/\*!.*?\*/)
+  | (?P<comment>/\*.*?\*/|//[^\n]*)
+  | (?P<slash>/)
+  | (?P<code>[^"'`/]+)
+""", re.S | re.X)
+LINE_BREAK_PATTERN = re.compile(r"[ \t]*\n\s*")
+REGEX_PATTERN = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*")
+
+# After one of these (or a keyword like return) a slash starts a regex literal
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'new', 'delete', 'void', 'throw')
+
+
+def _regex_allowed(previous):
+    previous = previous.rstrip()
+    if not previous or previous[-1] in REGEX_PRECEDERS:
+        return True
+    word = re.search(r"[\w$]+$", previous)
+    return word is not None and word.group() in REGEX_KEYWORDS
+
+
+def minify_js(source):
+    """
+    Conservative JavaScript minifier: removes comments (keeping /*! license
+    blocks), indentation and blank lines. Line breaks are kept, so automatic
+    semicolon insertion behaves exactly as before; strings, template literals
+    and regex literals are left untouched.
+    """
+    out = []
+    code = []
+
+    def flush():
+        # Drop indentation and trailing spaces, and never start a blank line
+        text = LINE_BREAK_PATTERN.sub("\n", "".join(code))
+        code.clear()
+        if text.startswith("\n") and (not out or out[-1].endswith("\n")):
+            text = text.lstrip("\n")
+        if text:
+            out.append(text)
+
+    position = 0
+    while position < len(source):
+        match = JS_TOKEN_PATTERN.match(source, position)
+        kind = match.lastgroup
+        position = match.end()
+        if kind == 'code':
+            code.append(match.group())
+        elif kind == 'comment':
+            code.append("\n" if match.group().startswith("//") else " ")
+        elif kind == 'slash':
+            regex = None
+            if _regex_allowed("".join(out[-2:] + code)):
+                regex = REGEX_PATTERN.match(source, match.start())
+            if regex is None:
+                code.append("/")
+            else:
+                flush()
+                out.append(regex.group())
+                position = regex.end()
+        else:
+            flush()
+            out.append(match.group())
+    flush()
+    return "".join(out).strip() + "\n"
+
+
+def build_bundle(name, root="..", extra=()):
+    """
+    Concatenate the page scripts, the extra inline snippets and main.js into
+    one minified file named after its content hash under BUNDLE_DIR, removing
+    older builds of the same bundle. Returns its path relative to root.
+    """
+    parts = []
+    for script in PAGE_SCRIPTS:
+        with open(os.path.join(root, script), 'r', encoding='utf-8') as file:
+            source = file.read()
+        parts.append(source if script.endswith('.min.js') else minify_js(source))
+    parts.extend(minify_js(snippet) for snippet in extra)
+    with open(os.path.join(root, MAIN_SCRIPT), 'r', encoding='utf-8') as file:
+        parts.append(minify_js(file.read()))
+    # A separator line keeps one file's last statement from running into the next
+    content = "\n;\n".join(part.strip() for part in parts) + "\n"
+
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    bundle = f"{BUNDLE_DIR}/{name}.{digest}.js"
+    folder = os.path.join(root, BUNDLE_DIR)
+    os.makedirs(folder, exist_ok=True)
+    if write_if_changed(os.path.join(root, bundle), content):
+        print(f"Bundled: {bundle}")
+
+    for stale in os.listdir(folder):
+        if stale.startswith(name + ".") and stale.endswith(".js") and stale != os.path.basename(bundle):
+            os.remove(os.path.join(folder, stale))
+    return bundle
@@ -0,0 +1,128 @@
+import argparse
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sitegen.output import OutputFile
+from sitegen.scan import SKIPPED_DIRS
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it only .gz siblings are written
+    brotli = None
+
+# Text outputs worth serving precompressed
+TEXT_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.xml', '.json')
+
+# Below this a compressed copy saves less than the response headers cost
+MIN_SIZE = 256
+
+
+def _gzip(data):
+    # mtime=0 keeps the output byte-identical between builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def encoders():
+    """
+    Return (suffix, compress function) for every available encoding
+    """
+    available = [('.gz', _gzip)]
+    if brotli is not None:
+        available.append(('.br', _brotli))
+    return available
+
+
+def is_current(path, suffixes):
+    """
+    A sibling is current when it carries the source's mtime, which is copied
+    onto it right after it is written
+    """
+    mtime = os.stat(path).st_mtime_ns
+    for suffix in suffixes:
+        try:
+            if os.stat(path + suffix).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def compress_file(path):
+    """
+    Write the compressed siblings of path. Returns the paths written.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as file:
+        data = file.read()
+    written = []
+    for suffix, compress in encoders():
+        sibling = path + suffix
+        with OutputFile(sibling) as output:
+            output.write(compress(data))
+        os.utime(sibling, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        written.append(sibling)
+    return written
+
+
+def find_outputs(root, extensions=TEXT_EXTENSIONS):
+    """
+    Walk root for text outputs, removing compressed siblings whose source is gone
+    """
+    outputs = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if name not in SKIPPED_DIRS)
+        names = set(files)
+        for name in sorted(files):
+            path = os.path.join(folder, name)
+            base, suffix = os.path.splitext(name)
+            if suffix in ('.gz', '.br'):
+                if base.endswith(extensions) and base not in names:
+                    os.remove(path)
+            elif name.endswith(extensions):
+                outputs.append(path)
+    return outputs
+
+
+def precompress(paths, workers=None, force=False):
+    """
+    Bring the compressed siblings of paths up to date, fanning the work out
+    over a process pool. Files too small to be worth it lose any siblings
+    left from when they were larger. Returns the list of siblings written.
+    """
+    suffixes = [suffix for suffix, _ in encoders()]
+    pending = []
+    for path in paths:
+        if os.path.getsize(path) < MIN_SIZE:
+            for suffix in ('.gz', '.br'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        elif force or not is_current(path, suffixes):
+            pending.append(path)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        results = [compress_file(path) for path in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            results = list(executor.map(compress_file, pending))
+    return [sibling for written in results for sibling in written]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings next to the site's text outputs")
+    parser.add_argument('root', nargs='?', default='.', help="site root to walk")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="recompress every file, even current ones")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed, writing .gz only")
+    outputs = find_outputs(args.root)
+    written = precompress(outputs, workers=args.workers, force=args.force)
+    print(f"Compressed {len(written)} files, {len(outputs)} outputs checked")
@@ -0,0 +1,53 @@
+import os
+import posixpath
+import re
+
+from sitegen.css import collect_used, filter_rules, load_stylesheet, rebase_urls, serialize
+
+# Local stylesheets as the layout links them
+STYLESHEET_LINK_PATTERN = re.compile(r'<link href="([^"?#]+\.css)" rel="stylesheet">')
+
+FOLD_START_PATTERN = re.compile(r"<main\b", re.I)
+FOLD_END_PATTERN = re.compile(r"</section\s*>|</main\s*>", re.I)
+
+
+def above_the_fold(page):
+    """
+    The part of a page shown on first paint: everything up to the end of the
+    first section of <main> (header and breadcrumbs included)
+    """
+    start = FOLD_START_PATTERN.search(page)
+    if start is None:
+        return page
+    end = FOLD_END_PATTERN.search(page, start.end())
+    return page[:end.end()] if end else page
+
+
+def stylesheet_hrefs(page):
+    head = page.split("</head>", 1)[0]
+    return STYLESHEET_LINK_PATTERN.findall(head)
+
+
+def extract_critical_css(page, page_dir=".", root="../"):
+    """
+    CSS needed to render the above-the-fold part of page, taken from the local
+    stylesheets it links, in link order. page_dir is the folder the page is
+    written to and root the relative path from there to the site root; url()
+    references come out relative to the site root behind a {{root}} slot, so
+    the result can be inlined into the layout of pages at any depth.
+    """
+    if isinstance(page, bytes):
+        page = page.decode('utf-8')
+    used = collect_used(above_the_fold(page))
+    site_root = posixpath.normpath(posixpath.join(page_dir, root))
+
+    parts = []
+    for href in stylesheet_hrefs(page):
+        path = posixpath.normpath(posixpath.join(page_dir, href))
+        if not os.path.isfile(path):
+            continue
+        # @charset is only valid at the very start of a stylesheet file
+        rules = [rule for rule in load_stylesheet(path) if not rule.prelude.lower().startswith('@charset')]
+        css = serialize(filter_rules(rules, used))
+        parts.append(rebase_urls(css, posixpath.dirname(path), site_root, prefix="{{root}}"))
+    return "".join(parts)
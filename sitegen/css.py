@@ -0,0 +1,321 @@
+import functools
+import os
+import posixpath
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# A parsed CSS rule. Style rules and descriptor blocks (@font-face...) have a
+# body; grouping at-rules (@media, @supports) have children instead; statement
+# at-rules (@charset, @import) have neither.
+Rule = namedtuple('Rule', ['prelude', 'body', 'children'])
+
+# Grouping at-rules whose block holds further rules
+GROUPING_AT_RULES = ('@media', '@supports', '@document', '@layer', '@container')
+
+# The characters the parser has to stop at; everything else is copied through
+SPECIAL_PATTERN = re.compile(r"""[{};"'/]""")
+STRING_PATTERN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|\s+""", re.S)
+DECLARATION_PATTERN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|\s*([:;,])\s*|\s+""", re.S)
+
+ATTRIBUTE_PATTERN = re.compile(r"\[\s*([\w-]+)[^\]]*\]")
+PSEUDO_PATTERN = re.compile(r"::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?")
+COMBINATOR_PATTERN = re.compile(r"\s*[\s>+~]\s*")
+TAG_PATTERN = re.compile(r"^[a-zA-Z][\w-]*")
+CLASS_PATTERN = re.compile(r"\.((?:[\w-]|\\.)+)")
+ID_PATTERN = re.compile(r"#((?:[\w-]|\\.)+)")
+URL_PATTERN = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+FONT_FAMILY_PATTERN = re.compile(r"font-family\s*:\s*([^;}]+)")
+FONT_PATTERN = re.compile(r"\bfont\s*:\s*([^;}]+)")
+ANIMATION_PATTERN = re.compile(r"animation(?:-name)?\s*:\s*([^;}]+)")
+
+
+def _skip_string(text, position):
+    """
+    position is on a quote; return the index just past the closing quote
+    """
+    quote = text[position]
+    position += 1
+    while position < len(text):
+        char = text[position]
+        if char == '\\':
+            position += 2
+        elif char == quote:
+            return position + 1
+        else:
+            position += 1
+    return position
+
+
+def _skip_comment(text, position):
+    end = text.find('*/', position + 2)
+    return len(text) if end == -1 else end + 2
+
+
+def _block_end(text, position):
+    """
+    position is just past an opening brace; return the index of the matching
+    closing brace
+    """
+    depth = 1
+    while True:
+        match = SPECIAL_PATTERN.search(text, position)
+        if match is None:
+            return len(text)
+        position = match.start()
+        char = text[position]
+        if char in '"\'':
+            position = _skip_string(text, position)
+        elif char == '/' and text.startswith('/*', position):
+            position = _skip_comment(text, position)
+        elif char == '{':
+            depth += 1
+            position += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return position
+            position += 1
+        else:
+            position += 1
+
+
+def parse_css(text):
+    """
+    Split a stylesheet into a list of Rules, dropping comments
+    """
+    rules = []
+    prelude = []
+    position = 0
+    while position < len(text):
+        match = SPECIAL_PATTERN.search(text, position)
+        if match is None:
+            break
+        prelude.append(text[position:match.start()])
+        position = match.start()
+        char = text[position]
+        if char in '"\'':
+            end = _skip_string(text, position)
+            prelude.append(text[position:end])
+            position = end
+        elif char == '/':
+            if text.startswith('/*', position):
+                position = _skip_comment(text, position)
+            else:
+                prelude.append(char)
+                position += 1
+        elif char == ';':
+            statement = "".join(prelude).strip()
+            if statement:
+                rules.append(Rule(statement, None, None))
+            prelude = []
+            position += 1
+        elif char == '{':
+            end = _block_end(text, position + 1)
+            head = "".join(prelude).strip()
+            block = text[position + 1:end]
+            if head.lower().startswith(GROUPING_AT_RULES):
+                rules.append(Rule(head, None, parse_css(block)))
+            else:
+                rules.append(Rule(head, block, None))
+            prelude = []
+            position = end + 1
+        else:
+            # A stray closing brace
+            prelude = []
+            position += 1
+    return rules
+
+
+def _compact(text):
+    # Collapse whitespace runs, leaving quoted strings alone
+    return STRING_PATTERN.sub(lambda match: match.group(1) or ' ', text).strip()
+
+
+def _compact_declarations(text):
+    # Declarations can also lose the whitespace around separators
+    return DECLARATION_PATTERN.sub(lambda match: match.group(1) or match.group(2) or ' ', text).strip().rstrip(';')
+
+
+def serialize(rules):
+    """
+    Write rules back out as compact CSS
+    """
+    out = []
+    for rule in rules:
+        if rule.children is not None:
+            out.append(f"{_compact(rule.prelude)}{{{serialize(rule.children)}}}")
+        elif rule.body is not None:
+            out.append(f"{_compact(rule.prelude)}{{{_compact_declarations(rule.body)}}}")
+        else:
+            out.append(f"{_compact(rule.prelude)};")
+    return "".join(out)
+
+
+@functools.lru_cache(maxsize=None)
+def _load(path, mtime_ns):
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        return tuple(parse_css(file.read()))
+
+
+def load_stylesheet(path):
+    """
+    Parsed rules of a stylesheet, cached until the file changes
+    """
+    return list(_load(os.path.abspath(path), os.stat(path).st_mtime_ns))
+
+
+Used = namedtuple('Used', ['tags', 'classes', 'ids', 'attributes'])
+
+
+class _UsageParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = {'html', 'body'}
+        self.classes = set()
+        self.ids = set()
+        self.attributes = set()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        for name, value in attrs:
+            self.attributes.add(name)
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+    handle_startendtag = handle_starttag
+
+
+def collect_used(*documents):
+    """
+    Tag names, classes, ids and attribute names used in the given HTML documents
+    """
+    parser = _UsageParser()
+    for document in documents:
+        parser.feed(document)
+    parser.close()
+    return Used(parser.tags, parser.classes, parser.ids, parser.attributes)
+
+
+def _unescape(name):
+    return re.sub(r"\\(.)", r"\1", name)
+
+
+def selector_matches(selector, used):
+    """
+    Whether a single (non-grouped) selector can match the used markup: every
+    tag, class, id and attribute it names has to occur somewhere. Attribute
+    values and pseudo-classes are ignored, so this errs on the side of keeping
+    a rule.
+    """
+    selector = PSEUDO_PATTERN.sub('', selector)
+    if any(name.lower() not in used.attributes for name in ATTRIBUTE_PATTERN.findall(selector)):
+        return False
+    selector = ATTRIBUTE_PATTERN.sub('', selector)
+    for compound in COMBINATOR_PATTERN.split(selector.strip()):
+        tag = TAG_PATTERN.match(compound)
+        if tag and tag.group().lower() not in used.tags:
+            return False
+        if any(_unescape(name) not in used.classes for name in CLASS_PATTERN.findall(compound)):
+            return False
+        if any(_unescape(name) not in used.ids for name in ID_PATTERN.findall(compound)):
+            return False
+    return True
+
+
+def _split_selectors(prelude):
+    # Commas inside :is()/:not() arguments do not separate selectors
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _names(pattern, declarations):
+    names = set()
+    for value in pattern.findall(declarations):
+        names.update(part.strip().strip('"\'').lower() for part in re.split(r"[,\s]+", value))
+    return names
+
+
+def _filter(rules, used):
+    kept = []
+    for rule in rules:
+        prelude = rule.prelude.lower()
+        if rule.children is not None:
+            children = _filter(rule.children, used)
+            if children:
+                kept.append(Rule(rule.prelude, None, children))
+        elif prelude.startswith(('@font-face', '@keyframes', '@-webkit-keyframes')):
+            # Kept or dropped once the style rules are known
+            kept.append(rule)
+        elif prelude.startswith('@') or rule.body is None:
+            kept.append(rule)
+        else:
+            selectors = [selector for selector in _split_selectors(rule.prelude) if selector_matches(selector, used)]
+            if selectors:
+                kept.append(Rule(",".join(selector.strip() for selector in selectors), rule.body, None))
+    return kept
+
+
+def _declarations(rules):
+    for rule in rules:
+        if rule.children is not None:
+            yield from _declarations(rule.children)
+        elif rule.body is not None and not rule.prelude.startswith('@'):
+            yield rule.body
+
+
+def _drop_unreferenced(rules, fonts, animations):
+    kept = []
+    for rule in rules:
+        prelude = rule.prelude.lower()
+        if rule.children is not None:
+            children = _drop_unreferenced(rule.children, fonts, animations)
+            if children:
+                kept.append(Rule(rule.prelude, None, children))
+        elif prelude.startswith('@font-face'):
+            if _names(FONT_FAMILY_PATTERN, rule.body) & fonts:
+                kept.append(rule)
+        elif prelude.startswith(('@keyframes', '@-webkit-keyframes')):
+            if prelude.split(None, 1)[-1].strip() in animations:
+                kept.append(rule)
+        else:
+            kept.append(rule)
+    return kept
+
+
+def filter_rules(rules, used):
+    """
+    Keep the rules that can apply to the used markup, plus the @font-face and
+    @keyframes blocks those rules refer to
+    """
+    kept = _filter(rules, used)
+    declarations = " ".join(_declarations(kept))
+    fonts = _names(FONT_FAMILY_PATTERN, declarations) | _names(FONT_PATTERN, declarations)
+    animations = _names(ANIMATION_PATTERN, declarations)
+    return _drop_unreferenced(kept, fonts, animations)
+
+
+def rebase_urls(css, from_dir, to_dir, prefix=""):
+    """
+    Rewrite relative url() references written for a stylesheet in from_dir so
+    they work from to_dir, prepending prefix
+    """
+    def rebase(match):
+        url = match.group(2).strip()
+        if url.startswith(('data:', '#', '/')) or '://' in url:
+            return match.group()
+        target = posixpath.normpath(posixpath.join(from_dir, url))
+        return f'url("{prefix}{posixpath.relpath(target, to_dir)}")'
+    return URL_PATTERN.sub(rebase, css)
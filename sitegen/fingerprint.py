@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from sitegen.css import URL_PATTERN
+from sitegen.output import write_if_changed
+from sitegen.scan import site_pages
+
+MANIFEST_NAME = "asset-manifest.json"
+
+# Hex digits of the content hash put in the file name
+HASH_LENGTH = 10
+
+# Files that get a content-hashed copy; pages themselves keep their names
+ASSET_EXTENSIONS = ('.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico',
+                    '.woff', '.woff2', '.ttf', '.eot', '.otf')
+
+REFERENCE_PATTERN = re.compile(r"""\b(src|href|poster)(\s*=\s*)(["'])(.*?)\3""", re.I | re.S)
+SRCSET_PATTERN = re.compile(r"""\b(srcset)(\s*=\s*)(["'])(.*?)\3""", re.I | re.S)
+QUERY_PATTERN = re.compile(r"[?#]")
+
+
+def read_manifest(root="."):
+    """
+    Source asset -> hashed copy, both relative to root, as of the last run
+    """
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _split_url(url):
+    match = QUERY_PATTERN.search(url)
+    return (url, "") if match is None else (url[:match.start()], url[match.start():])
+
+
+class Fingerprinter:
+    """
+    Copies assets to content-hashed names (styles.css -> styles.<hash>.css)
+    and rewrites references to them. The manifest maps each source asset to
+    its hashed copy; the previous one is used to recognise references that
+    were already rewritten, so the stage can run again over its own output.
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.previous = read_manifest(root)
+        self.sources = {hashed: source for source, hashed in self.previous.items()}
+        self.assets = {}
+        self.pending = set()
+
+    def _relative(self, path):
+        return posixpath.relpath(posixpath.normpath(path), self.root)
+
+    def source_for(self, path):
+        """
+        The source asset behind path, which may be a hashed copy from an earlier run
+        """
+        relative = self._relative(path)
+        return posixpath.join(self.root, self.sources.get(relative, relative))
+
+    def fingerprint(self, path):
+        """
+        Write the hashed copy of the asset at path (rewriting a stylesheet's own
+        references first) and return the copy's path
+        """
+        relative = self._relative(path)
+        if relative in self.assets:
+            return posixpath.join(self.root, self.assets[relative])
+        if relative in self.pending:
+            # A reference cycle; leave this one unhashed
+            return path
+        self.pending.add(relative)
+
+        with open(path, 'rb') as file:
+            content = file.read()
+        if path.endswith('.css'):
+            css = content.decode('utf-8', errors='replace')
+            content = self.rewrite_css(css, posixpath.dirname(path)).encode('utf-8')
+
+        stem, extension = posixpath.splitext(path)
+        digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        hashed_path = f"{stem}.{digest}{extension}"
+        if write_if_changed(hashed_path, content):
+            print(f"Fingerprinted: {hashed_path}")
+
+        self.pending.discard(relative)
+        self.assets[relative] = self._relative(hashed_path)
+        return hashed_path
+
+    def rewrite_url(self, url, base_dir):
+        """
+        The hashed equivalent of url as seen from base_dir, or None to leave it alone
+        """
+        path, suffix = _split_url(url.strip())
+        if not path or path.startswith(('/', 'data:')) or '://' in path or not path.lower().endswith(ASSET_EXTENSIONS):
+            return None
+        source = self.source_for(posixpath.join(base_dir, path))
+        if not os.path.isfile(source):
+            return None
+        hashed_path = self.fingerprint(source)
+        return posixpath.relpath(hashed_path, base_dir or '.') + suffix
+
+    def rewrite_css(self, css, base_dir):
+        def rewrite(match):
+            url = self.rewrite_url(match.group(2), base_dir)
+            return match.group() if url is None else f'url("{url}")'
+        return URL_PATTERN.sub(rewrite, css)
+
+    def rewrite_page(self, page_path):
+        """
+        Point every asset reference in a page at its hashed copy. Returns True
+        if the page was rewritten.
+        """
+        with open(page_path, 'r', encoding='utf-8', errors='replace') as file:
+            page = file.read()
+        base_dir = posixpath.dirname(page_path)
+
+        def attribute(match):
+            url = self.rewrite_url(match.group(4), base_dir)
+            if url is None:
+                return match.group()
+            return f"{match.group(1)}{match.group(2)}{match.group(3)}{url}{match.group(3)}"
+
+        def srcset(match):
+            candidates = []
+            for candidate in match.group(4).split(','):
+                parts = candidate.split()
+                if parts:
+                    parts[0] = self.rewrite_url(parts[0], base_dir) or parts[0]
+                candidates.append(" ".join(parts))
+            return f"{match.group(1)}{match.group(2)}{match.group(3)}{', '.join(candidates)}{match.group(3)}"
+
+        rewritten = REFERENCE_PATTERN.sub(attribute, page)
+        rewritten = SRCSET_PATTERN.sub(srcset, rewritten)
+        # Inline styles and <style> blocks (the inlined critical CSS among them)
+        rewritten = self.rewrite_css(rewritten, base_dir)
+        return rewritten != page and write_if_changed(page_path, rewritten)
+
+    def prune(self):
+        """
+        Remove hashed copies from earlier runs that nothing maps to any more
+        """
+        current = set(self.assets.values())
+        for hashed in set(self.previous.values()) - current:
+            path = posixpath.join(self.root, hashed)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"Removed: {path}")
+
+    def save(self):
+        write_if_changed(self.manifest_path, json.dumps(self.assets, indent=2, sort_keys=True) + "\n")
+
+
+def fingerprint_site(root="."):
+    fingerprinter = Fingerprinter(root)
+    for page_path in site_pages(root):
+        if fingerprinter.rewrite_page(page_path):
+            print(f"Rewritten: {page_path}")
+    fingerprinter.prune()
+    fingerprinter.save()
+    return fingerprinter.assets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy assets to content-hashed names and rewrite the pages that use them")
+    parser.add_argument('root', nargs='?', default='.', help="site root")
+    args = parser.parse_args()
+
+    fingerprint_site(args.root)
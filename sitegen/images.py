@@ -0,0 +1,345 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from sitegen.manifest import state_path
+from sitegen.scan import list_files
+from sitegen.timing import collect, stage, timer
+
+CACHE_DIR = "image-cache"
+
+# Part of every cache key: bump when save_with_variants, reduce_for_target or
+# anything else here changes what a render writes
+RENDER_VERSION = 1
+
+# Widths of the responsive variants written next to each processed image
+VARIANT_WIDTHS = (320, 640, 960, 1280)
+
+# One decode/resize/encode unit of work: render(source_path, output_path, **settings)
+ImageJob = namedtuple('ImageJob', ['render', 'source_path', 'output_path', 'settings'])
+
+
+class DerivativeCache:
+    """
+    Content-addressed cache of processed images
+
+    A derivative is keyed on the hash of the source bytes, the settings it
+    was rendered with and the version of the code rendering it, so unchanged
+    sources are never decoded again. Entries no job looked up during a build
+    are dropped by prune().
+    """
+
+    def __init__(self, root=None):
+        self.root = root or state_path(CACHE_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self.index_path = os.path.join(self.root, "sources.json")
+        self.dirty = False
+        # Remember source hashes by (size, mtime) so unchanged files are not re-read
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                self.sources = json.load(file)
+        except (OSError, ValueError):
+            self.sources = {}
+        self.renderers = {}
+        # Cache files and sources looked up this build, for prune()
+        self.used = set()
+        self.used_sources = set()
+
+    def renderer_version(self, render):
+        """
+        Hash of the source of render itself, so editing it (but not the rest
+        of its module) invalidates its derivatives
+        """
+        if render not in self.renderers:
+            try:
+                code = inspect.getsource(render)
+            except (OSError, TypeError):
+                code = render.__qualname__
+            self.renderers[render] = hashlib.sha256(code.encode('utf-8')).hexdigest()
+        return self.renderers[render]
+
+    def source_hash(self, source_path):
+        stat = os.stat(source_path)
+        key = os.path.abspath(source_path)
+        self.used_sources.add(key)
+        known = self.sources.get(key)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        self.sources[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self.dirty = True
+        return digest.hexdigest()
+
+    def key(self, source_path, settings):
+        digest = hashlib.sha256(self.source_hash(source_path).encode('utf-8'))
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def path_for(self, key, output_path):
+        extension = os.path.splitext(output_path)[1]
+        return os.path.join(self.root, key[:2], key + extension)
+
+    def lookup(self, source_path, output_path, render, settings):
+        """
+        Return the cache path of the derivative described by the arguments
+        """
+        widths = settings.get('widths', ())
+        settings = dict(settings, renderer=render.__name__, renderer_version=self.renderer_version(render),
+                        render_version=RENDER_VERSION)
+        cached_path = self.path_for(self.key(source_path, settings), output_path)
+        self.used.add(cached_path)
+        self.used.update(variant_path(cached_path, width) for width in widths)
+        return cached_path
+
+    def install(self, cached_path, output_path, widths=()):
+        """
+        Copy a cached derivative and its variants to output_path unless they
+        are already there. Copies keep the cached file's mtime, so a target
+        with the same size and mtime is taken to be the same file. Variants
+        of output_path that the cached derivative does not have (left from
+        a wider source) are removed.
+        """
+        if not os.path.exists(cached_path):
+            return False
+        pairs = [(variant_path(cached_path, width), variant_path(output_path, width)) for width in widths]
+        pairs.append((cached_path, output_path))
+        for source, target in pairs:
+            if not os.path.exists(source):
+                _remove_if_exists(target)
+            elif not _same_stat(source, target):
+                shutil.copy2(source, target)
+        return True
+
+    def fetch(self, source_path, output_path, render, **settings):
+        """
+        Place the derivative of source_path in output_path, calling
+        render(source_path, path, **settings) only on a cache miss.
+        Returns True if output_path holds a valid derivative.
+        """
+        cached_path = self.lookup(source_path, output_path, render, settings)
+        if not os.path.exists(cached_path):
+            _render_into(render, source_path, cached_path, settings)
+        return self.install(cached_path, output_path, settings.get('widths', ()))
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.sources, file)
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    def prune(self):
+        """
+        Delete the derivatives and source hashes no lookup asked for since
+        the cache was opened, so superseded renders do not pile up. Only
+        call it after a build that looked up every image.
+        """
+        removed = 0
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(folder, name)
+                if path != self.index_path and path not in self.used:
+                    os.remove(path)
+                    removed += 1
+            if folder != self.root and not os.listdir(folder):
+                os.rmdir(folder)
+        for key in list(self.sources):
+            if key not in self.used_sources:
+                del self.sources[key]
+                self.dirty = True
+        self.save()
+        return removed
+
+
+def _remove_if_exists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _same_stat(source, target):
+    try:
+        target_stat = os.stat(target)
+    except OSError:
+        return False
+    source_stat = os.stat(source)
+    return (source_stat.st_size, source_stat.st_mtime_ns) == (target_stat.st_size, target_stat.st_mtime_ns)
+
+
+def variant_path(path, width):
+    """
+    Path of the variant of an image scaled to the given width
+    """
+    stem, extension = os.path.splitext(path)
+    return f"{stem}-{width}w{extension}"
+
+
+def reduce_for_target(img, size, reducing_gap=2.0):
+    """
+    Shrink an opened image cheaply towards size before the real resample.
+    JPEG sources are scaled by the decoder itself (1/2, 1/4 or 1/8) via
+    draft(), so the full-size bitmap is never built; other formats are
+    box-reduced by an integer factor. At least reducing_gap times the target
+    is kept so the final high-quality resample still has the detail it needs.
+    Must be called before the image is loaded or converted.
+    """
+    limit = (int(size[0] * reducing_gap), int(size[1] * reducing_gap))
+    if img.format == 'JPEG':
+        img.draft(None, limit)
+        return img
+
+    factor = min(img.width // limit[0], img.height // limit[1])
+    if factor < 2:
+        return img
+    try:
+        return img.reduce(factor)
+    except ValueError:
+        # Some modes (e.g. palette images) cannot be reduced
+        return img
+
+
+def save_with_variants(img, output_path, widths=(), label=None, **save_options):
+    """
+    Save img and a downscaled copy for every width narrower than it, all from
+    the one decoded image. Each variant is resampled from the previous,
+    larger one. label names the image in build timings (default: output_path).
+    """
+    label = label or output_path
+    with stage("image_encode", label):
+        img.save(output_path, **save_options)
+    for width in sorted(widths, reverse=True):
+        if width >= img.width:
+            continue
+        height = max(1, round(img.height * width / img.width))
+        with stage("image_resize", f"{label} @{width}w"):
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+        with stage("image_encode", f"{label} @{width}w"):
+            img.save(variant_path(output_path, width), **save_options)
+
+
+def srcset(path, widths=VARIANT_WIDTHS):
+    """
+    srcset value listing the variants of path that exist plus path itself.
+    Variants are only written for widths narrower than the image, so wider
+    ones are never listed, even if a file of that name is lying around.
+    """
+    if not os.path.exists(path):
+        return ""
+    # Only the header is read to get the width
+    with Image.open(path) as img:
+        image_width = img.width
+    folder = os.path.dirname(path) or '.'
+    available = set(list_files(folder))
+    candidates = [f"{variant_path(path, width)} {width}w" for width in widths
+                  if width < image_width and os.path.basename(variant_path(path, width)) in available]
+    candidates.append(f"{path} {image_width}w")
+    return ", ".join(candidates)
+
+
+def responsive_attrs(path, sizes, widths=VARIANT_WIDTHS):
+    """
+    srcset and sizes attributes for an <img> whose src is path
+    """
+    value = srcset(path, widths)
+    if not value:
+        return ""
+    return f' srcset="{value}" sizes="{sizes}"'
+
+
+def _render_into(render, source_path, target_path, settings):
+    """
+    Render to a temporary file and move it into place, so an interrupted or
+    failed render never leaves a truncated image behind
+    """
+    folder = os.path.dirname(target_path) or '.'
+    os.makedirs(folder, exist_ok=True)
+    # A unique temp name, so renders of the same target never share one; it
+    # keeps the real extension so the encoder can infer the format
+    stem, extension = os.path.splitext(os.path.basename(target_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{stem}.", suffix=".tmp" + extension, dir=folder)
+    os.close(fd)
+    widths = settings.get('widths', ())
+    try:
+        with stage("image", source_path):
+            render(source_path, tmp_path, **settings)
+        if os.path.getsize(tmp_path) == 0:
+            # The render failed before writing anything
+            return False
+        # mkstemp creates files 0600
+        os.chmod(tmp_path, 0o644)
+        # Variants first, so an existing main image means the whole set is in
+        # place; variants this render did not produce are stale
+        for width in widths:
+            if os.path.exists(variant_path(tmp_path, width)):
+                os.replace(variant_path(tmp_path, width), variant_path(target_path, width))
+            else:
+                _remove_if_exists(variant_path(target_path, width))
+        os.replace(tmp_path, target_path)
+        return True
+    finally:
+        for path in [tmp_path] + [variant_path(tmp_path, width) for width in widths]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def run_image_jobs(jobs, cache=None, workers=None):
+    """
+    Run every image job, fanning cache misses out over a process pool.
+    workers defaults to the CPU count; 1 runs everything in this process.
+    Returns a dict of output_path -> True if the image was produced.
+    """
+    results = {}
+    pending = []
+    for job in jobs:
+        if cache is None:
+            pending.append((job, job.output_path))
+            continue
+        cached_path = cache.lookup(job.source_path, job.output_path, job.render, job.settings)
+        if os.path.exists(cached_path):
+            results[job.output_path] = cache.install(cached_path, job.output_path, job.settings.get('widths', ()))
+        else:
+            pending.append((job, cached_path))
+
+    # Byte-identical sources share a cache entry; each target is rendered once
+    # and then installed to every output that needs it
+    unique = {}
+    for job, target in pending:
+        unique.setdefault(target, job)
+
+    workers = workers or os.cpu_count() or 1
+    rendered = {}
+    if workers == 1 or len(unique) <= 1:
+        for target, job in unique.items():
+            rendered[target] = _render_into(job.render, job.source_path, target, job.settings)
+    else:
+        with stage("image_jobs", f"{len(unique)} images"), \
+                ProcessPoolExecutor(max_workers=min(workers, len(unique))) as executor:
+            # Workers hand their timing records back with the result
+            futures = {target: executor.submit(collect, timer.enabled, _render_into, job.render, job.source_path,
+                                               target, job.settings)
+                       for target, job in unique.items()}
+            for target, future in futures.items():
+                ok, records = future.result()
+                timer.records.extend(records)
+                rendered[target] = ok
+
+    for job, target in pending:
+        ok = rendered[target]
+        if cache is not None and ok:
+            ok = cache.install(target, job.output_path, job.settings.get('widths', ()))
+        results[job.output_path] = ok
+    return results
@@ -0,0 +1,321 @@
+import functools
+import html
+import re
+
+from sitegen.minify import minified
+
+# Shared page shell for every generated page. {{name}} marks a slot; "root" is
+# bound once per layout (the relative path back to the site root), the others
+# are filled per page.
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta content="width=device-width, initial-scale=1.0" name="viewport">
+
+  <title>{{title}}</title>
+  <meta name="description" content="{{description}}">
+  <meta name="keywords" content="{{keywords}}">
+
+  <!-- Favicons -->
+  <link href="{{root}}assets/images/favicon.png" rel="icon">
+  <link href="{{root}}assets/images/apple-touch-icon.png" rel="apple-touch-icon">
+
+  <!-- Google Fonts -->
+  <link href="../../../css2?family=Open+Sans:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,600;1,700&amp;family=Montserrat:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;family=Raleway:ital,wght@0,300;0,400;0,500;0,600;0,700;1,300;1,400;1,500;1,600;1,700&amp;display=swap" rel="stylesheet">
+  <link rel="preconnect" href="https://fonts.googleapis.com">
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin="">
+  <link href="../../../css2-1?family=Oswald:wght@500&amp;display=swap" rel="stylesheet">
+  <link href="../../../css2-2?family=Poppins:wght@300;400&amp;display=swap" rel="stylesheet">
+  <!-- Vendor CSS Files -->
+  <link href="{{root}}assets/vendor/aos/aos.css" rel="stylesheet">
+  <link href="{{root}}assets/vendor/swiper/swiper-bundle.min.css" rel="stylesheet">
+  <link href="{{root}}assets/stylesheets/font-awesome.min.css" rel="stylesheet">
+  <link href="{{root}}assets/vendor/glightbox/css/glightbox.min.css" rel="stylesheet">
+  <link href="{{root}}assets/vendor/bootstrap/css/bootstrap.min.css" rel="stylesheet">
+  <link href="{{root}}assets/vendor/bootstrap-icons/bootstrap-icons.css" rel="stylesheet">
+  <!-- Main CSS File -->
+  <link href="{{root}}assets/stylesheets/styles.css" rel="stylesheet">
+{{head}}
+</head>
+
+<body>
+
+  <header id="header" class="header d-flex align-items-center sticked stikcy-menu">
+    <div class="container-fluid container-xl d-flex align-items-center justify-content-between">
+      <a href="{{root}}index.html" class="logo d-flex align-items-center">
+        <img src="{{root}}assets/images/Logo-new.png" alt="logo">
+      </a>
+      <nav id="navbar" class="navbar">
+        <ul>
+          <li><a href="{{root}}index.html" class="">Home</a></li>
+          <li><a href="{{root}}services.html" class="">Services</a></li>
+          <li><a href="{{root}}portfolio.html" class="">Portfolio</a></li>
+          <li><a href="{{root}}testimonials.html" class="">Testimonials</a></li>
+          <li class="dropdown"><a href="#"><span>Menu</span> <i class="bi bi-chevron-down dropdown-indicator"></i></a>
+            <ul>
+              <li><a href="{{root}}about.html">About</a></li>
+              <li><a href="{{root}}faqs.html">FAQs</a></li>
+              <li><a href="{{root}}privacy-policy.html">Privacy Policy</a></li>
+            </ul>
+          </li>
+          <li><a href="{{root}}blogs.html">Blogs</a></li>
+        </ul>
+      </nav><!-- .navbar -->
+      <a href="{{root}}contact.html" class="btn-get-started hide-on-mobile">Get Quotes</a>
+      <button id="darkmode-button"><i class="bi bi-moon-fill"></i></button>
+      <i class="mobile-nav-toggle mobile-nav-show bi bi-list"></i>
+      <i class="mobile-nav-toggle mobile-nav-hide d-none bi bi-x"></i>
+    </div>
+  </header>
+
+{{body}}
+
+  <!-- Footer -->
+  <footer id="footer" class="footer-section">
+    <div class="container">
+      <div class="footer-content pt-5 pb-5">
+        <div class="row">
+          <div class="col-xl-4 col-lg-4 mb-50">
+            <div class="footer-widget">
+              <div class="footer-logo">
+                <a href="{{root}}index.html" class="logo d-flex align-items-center">
+                  <img src="{{root}}assets/images/Logo-new-2.png" alt="logo">
+                </a>
+              </div>
+              <div class="footer-text">
+                <p>BITS India specializes in delivering cutting-edge technology solutions across various domains, including application design, web development, surveillance, AI, cybersecurity, IoT, and smart systems. Our mission is to empower businesses with innovative tools and strategies that drive growth, efficiency, and security.
+                </p>
+              </div>
+
+              <div class="footer-social-icon">
+                <a href="https://www.linkedin.com/in/bits-india/" target="_blank" class="linkedin"><i class="bi bi-linkedin"></i></a>
+              </div>
+
+            </div>
+          </div>
+
+          <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
+            <div class="service-widget footer-widget">
+              <div class="footer-widget-heading">
+                <h3>Services</h3>
+              </div>
+              <ul class="list">
+                <li><a href="{{root}}portfolio.html#all" class="filter-active">All</a></li>
+                <li><a href="{{root}}portfolio.html#application-design">Application Design</a></li>
+                <li><a href="{{root}}portfolio.html#web-designing">Web Designing</a></li>
+                <li><a href="{{root}}portfolio.html#surveillance-solutions">Surveillance Solutions</a></li>
+                <li><a href="{{root}}portfolio.html#ai-solutions">AI Solutions</a></li>
+                <li><a href="{{root}}portfolio.html#cybersecurity-solutions">Cybersecurity Solutions</a></li>
+                <li><a href="{{root}}portfolio.html#iot-smart-systems">IoT and Smart Systems</a></li>
+                <li><a href="{{root}}portfolio.html#ui-ux-designs">UI/UX Designs</a></li>
+              </ul>
+            </div>
+          </div>
+          <div class="col-lg-2 col-md-6 col-sm-12 footer-column">
+            <div class="service-widget footer-widget">
+              <div class="footer-widget-heading">
+                <h3>Information</h3>
+              </div>
+              <ul class="list">
+                <li><a href="{{root}}about.html">About</a></li>
+                <li><a href="{{root}}portfolio.html">Portfolio</a></li>
+                <li><a href="{{root}}faqs.html">FAQs</a></li>
+                <li><a href="{{root}}blogs.html">Blogs</a></li>
+                <li><a href="{{root}}privacy-policy.html">Privacy Policy</a></li>
+              </ul>
+            </div>
+          </div>
+          <div class="col-xl-4 col-lg-4 col-md-6 mb-50">
+            <div class="contact-widget footer-widget">
+              <div class="footer-widget-heading">
+                <h3>Contacts</h3>
+              </div>
+              <div class="footer-text">
+                <p><i class="bi bi-geo-alt-fill mr-15"></i> Shop No 10, Unity Splendour, Salunke Vihar Rd, Wanowrie, Pune, Maharashtra 411040</p>
+                <p><i class="bi bi-telephone-inbound-fill mr-15"></i> +1 1234 56 789</p>
+                <p><i class="bi bi-envelope-fill mr-15"></i> contact@bitsindia.in</p>
+              </div>
+            </div>
+          </div>
+        </div>
+        <div class="row">
+          <div class="col-xl-6 col-lg-6 text-left text-lg-left">
+            <div class="copyright-text">
+              <p>BITS India © 2024</p>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+  </footer>
+
+  <a href="#" class="scroll-top d-flex align-items-center justify-content-center active">
+    <i class="bi bi-arrow-up-short"></i>
+  </a>
+
+  <div id="preloader"></div>
+
+  <!-- Vendor JS Files -->
+  <script src="{{root}}assets/javascripts/jquery.min.js"></script>
+  <script src="{{root}}assets/vendor/glightbox/js/glightbox.min.js"></script>
+  <script src="{{root}}assets/vendor/bootstrap/js/bootstrap.bundle.min.js"></script>
+  <script src="{{root}}assets/vendor/aos/aos.js"></script>
+  <script src="{{root}}assets/vendor/swiper/swiper-bundle.min.js"></script>
+  <script src="{{root}}assets/javascripts/plugins.js"></script>
+  <script src="{{root}}assets/javascripts/purecounter_vanilla.js"></script>
+  <script src="{{root}}assets/javascripts/validator.min.js"></script>
+  <script src="{{root}}assets/javascripts/contactform.js"></script>
+  <script src="{{root}}assets/javascripts/particles.min.js"></script>
+  <script src="{{root}}assets/javascripts/script.js"></script>
+
+  <!-- Template Main JS File -->
+  <script src="{{root}}assets/javascripts/main.js"></script>
+{{scripts}}
+</body>
+</html>
+"""
+
+SITE_TITLE = "BITS India - Business & IT Solutions - Innovating Defence & Commercial Technology"
+SITE_DESCRIPTION = "BITS India - Business & IT Solutions | Innovating Defence & Commercial Technology"
+
+SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+# Slots holding plain text; they are escaped before being placed in the page
+TEXT_SLOTS = ('title', 'description', 'keywords')
+
+SCRIPT_PATTERN = re.compile(r'\n\s*(?:<!-- [\w ]+ JS Files? -->\s*)?<script src="\{\{root\}\}[^"]+"></script>')
+PRELOADER_PATTERN = re.compile(r'\n\s*<div id="preloader"></div>')
+STYLESHEET_PATTERN = re.compile(r'<link href="(\{\{root\}\}[^"]+\.css)" rel="stylesheet">')
+
+
+def defer_stylesheets(template, critical_css):
+    """
+    Inline critical_css in the head and turn the template's own stylesheet
+    links into non-blocking preloads, with a <noscript> fallback
+    """
+    def preload(match):
+        href = match.group(1)
+        return (f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+    first = STYLESHEET_PATTERN.search(template)
+    if first is None:
+        return template
+    head = template[:first.start()] + f"<style>{critical_css}</style>\n  "
+    return head + STYLESHEET_PATTERN.sub(preload, template[first.start():])
+
+
+def strip_scripts(template):
+    """
+    Remove the template's own script tags, and the preloader overlay that
+    only main.js would take away
+    """
+    return SCRIPT_PATTERN.sub("", PRELOADER_PATTERN.sub("", template))
+
+
+def bundle_scripts(template, bundle):
+    """
+    Replace the template's own script tags with one deferred bundle
+    """
+    first = SCRIPT_PATTERN.search(template)
+    if first is None:
+        return template
+    tag = f'\n  <script src="{{{{root}}}}{bundle}" defer></script>'
+    return template[:first.start()] + tag + SCRIPT_PATTERN.sub("", template[first.start():])
+
+
+def compile_template(template, **bound):
+    """
+    Split a template into immutable byte chunks and the names of the slots
+    between them. Slots given in bound are substituted now, once per build.
+    """
+    chunks = [b""]
+    slots = []
+    position = 0
+    for match in SLOT_PATTERN.finditer(template):
+        chunks[-1] += template[position:match.start()].encode('utf-8')
+        name = match.group(1)
+        if name in bound:
+            chunks[-1] += bound[name].encode('utf-8')
+        else:
+            slots.append(name)
+            chunks.append(b"")
+        position = match.end()
+    chunks[-1] += template[position:].encode('utf-8')
+    return tuple(chunks), tuple(slots)
+
+
+class Layout:
+    """
+    Precompiled page shell; render() only has to join the static chunks with
+    the per-page slot values. With minify=True pages are minified as they
+    are streamed out; with critical_css the CSS is inlined and the
+    stylesheets load without blocking rendering; with script_bundle (a path
+    from the site root) one deferred bundle replaces the separate scripts.
+    With scripts=False the page loads none of the site's scripts at all.
+    """
+
+    def __init__(self, root, template=PAGE_TEMPLATE, minify=False, critical_css="", script_bundle="", scripts=True):
+        self.root = root
+        self.minify = minify
+        self.critical_css = critical_css
+        self.script_bundle = script_bundle
+        self.scripts = scripts
+        if critical_css:
+            template = defer_stylesheets(template, critical_css)
+        if not scripts:
+            template = strip_scripts(template)
+        elif script_bundle:
+            template = bundle_scripts(template, script_bundle)
+        self.chunks, self.slots = compile_template(template, root=root)
+
+    def iter_chunks(self, *args, **kwargs):
+        """
+        Yield the page as a sequence of byte chunks
+        """
+        chunks = self._iter_page(*args, **kwargs)
+        return minified(chunks) if self.minify else chunks
+
+    def _iter_page(self, title=SITE_TITLE, description=SITE_DESCRIPTION, keywords="", body="", head="", scripts=""):
+        values = {
+            'title': title,
+            'description': description,
+            'keywords': keywords,
+            'body': body,
+            'head': head,
+            'scripts': scripts,
+        }
+        for name in TEXT_SLOTS:
+            values[name] = html.escape(values[name])
+
+        yield self.chunks[0]
+        for name, chunk in zip(self.slots, self.chunks[1:]):
+            value = values[name]
+            if isinstance(value, (str, bytes)):
+                value = (value,)
+            # Any other iterable is streamed piece by piece
+            for piece in value:
+                yield piece if isinstance(piece, bytes) else piece.encode('utf-8')
+            yield chunk
+
+    def render(self, *args, **kwargs):
+        """
+        Render the whole page to bytes
+        """
+        return b"".join(self.iter_chunks(*args, **kwargs))
+
+    def write(self, stream, *args, **kwargs):
+        """
+        Stream the page to a binary file-like object without building it in memory
+        """
+        for chunk in self.iter_chunks(*args, **kwargs):
+            stream.write(chunk)
+
+
+@functools.lru_cache(maxsize=None)
+def get_layout(root="../", minify=False, critical_css="", script_bundle="", scripts=True):
+    """
+    Return the shared layout for pages living at the given depth
+    """
+    return Layout(root, minify=minify, critical_css=critical_css, script_bundle=script_bundle, scripts=scripts)
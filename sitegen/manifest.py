@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+
+# All persistent build state lives under this folder, relative to where a generator runs
+STATE_DIR = ".sitegen"
+
+
+def state_path(name):
+    """
+    Return the path of a build state file, creating the state folder if needed
+    """
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
+
+
+def source_digest(*paths):
+    """
+    Hash the given source files, used as the "template version" of a generator
+    so that editing a template invalidates every page built from it
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def record_digest(record, template_digest):
+    """
+    Hash a JSON record together with the template digest
+    """
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(template_digest.encode('utf-8'))
+    digest.update(payload.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent map of output file -> digest of the inputs it was built from
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            # Missing or corrupt manifest simply means a full rebuild
+            self.entries = {}
+
+    def is_current(self, output_file, digest):
+        return self.entries.get(output_file) == digest and os.path.exists(output_file)
+
+    def update(self, output_file, digest):
+        if self.entries.get(output_file) != digest:
+            self.entries[output_file] = digest
+            self.dirty = True
+
+    def prune(self, keep):
+        """
+        Forget outputs that are no longer produced
+        """
+        keep = set(keep)
+        for output_file in list(self.entries):
+            if output_file not in keep:
+                del self.entries[output_file]
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
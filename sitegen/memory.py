@@ -0,0 +1,228 @@
+import bisect
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; the getrusage peak is then left out
+    resource = None
+
+# Seconds between RSS samples
+SAMPLE_INTERVAL = 0.01
+
+# Allocation sites listed in the report
+TOP_ALLOCATIONS = 15
+
+# A new allocation snapshot is taken when traced memory at a stage boundary
+# grows past the last snapshot's by this factor
+SNAPSHOT_GROWTH = 1.25
+MIN_SNAPSHOT_BYTES = 1 << 20
+
+# RSS is sampled from /proc, so only where it exists (Linux)
+RSS_AVAILABLE = os.path.exists("/proc/self/statm")
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if RSS_AVAILABLE else 0
+
+# Traced memory used while no stage is open is reported under this name
+UNSTAGED = "(unstaged)"
+
+# Frames that belong to the profiler or the import system, not the build
+IGNORED_FRAMES = (
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, threading.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def process_rss(pid="self"):
+    """
+    Resident set size of a process in bytes, or 0 if it cannot be read
+    """
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def child_pids():
+    """
+    Direct children of this process (the image workers), from /proc
+    """
+    pid = os.getpid()
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", 'r') as file:
+            return [int(child) for child in file.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def _stop_in_child():
+    # Forked image workers inherit tracing; they are measured by RSS instead
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_stop_in_child)
+
+
+def max_rss():
+    """
+    Peak RSS of this process in bytes according to getrusage, or None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryProfiler:
+    """
+    Peak memory per build stage. Python allocations are traced exactly with
+    tracemalloc: the traced peak is folded into every open stage and reset
+    at each stage boundary. Memory outside Python's allocator (PIL's decoded
+    bitmaps, mostly) only shows in the RSS, which a thread samples for this
+    process and for each of its worker processes; a stage's RSS is that of
+    the process it ran in.
+
+    Plugs into the build timer as a listener: enter(name) and exit(name, item)
+    are called around every stage.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.open = []
+        self.traced_peaks = {}
+        self.traced_peak = 0
+        self.samples = []
+        self.snapshot = None
+        self.snapshot_bytes = MIN_SNAPSHOT_BYTES
+        self.snapshot_stage = None
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+
+    def start(self):
+        tracemalloc.start()
+        if RSS_AVAILABLE:
+            self._sampler.start()
+
+    def stop(self):
+        self._fold()
+        self._stop.set()
+        if self._sampler.is_alive():
+            self._sampler.join()
+        tracemalloc.stop()
+
+    def _sample(self):
+        pid = os.getpid()
+        while not self._stop.is_set():
+            sample = {child: process_rss(child) for child in child_pids()}
+            sample[pid] = process_rss()
+            self.samples.append((time.perf_counter(), sample))
+            self._stop.wait(self.interval)
+
+    def _fold(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.traced_peak = max(self.traced_peak, peak)
+        for name in self.open or (UNSTAGED,):
+            self.traced_peaks[name] = max(self.traced_peaks.get(name, 0), peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def enter(self, name):
+        self._fold()
+        self.open.append(name)
+
+    def exit(self, name, item):
+        current = self._fold()
+        self.open.pop()
+        if current > self.snapshot_bytes:
+            # Keep the allocation sites of the fullest moment seen so far
+            self.snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED_FRAMES)
+            self.snapshot_bytes = current * SNAPSHOT_GROWTH
+            self.snapshot_stage = name if item is None else f"{name} {item}"
+
+    def stage_rss(self, records):
+        """
+        stage -> (peak RSS of the process running it, peak RSS of all
+        workers) over the samples taken while a record of that stage ran
+        """
+        times = [sample[0] for sample in self.samples]
+        pid = os.getpid()
+        peaks = {}
+        for name, _, start, seconds, record_pid in records:
+            window = self.samples[bisect.bisect_left(times, start):bisect.bisect_right(times, start + seconds)]
+            window = [rss for _, rss in window if record_pid in rss]
+            if not window:
+                continue
+            own, workers = peaks.get(name, (0, None))
+            own = max(own, max(rss[record_pid] for rss in window))
+            if record_pid == pid:
+                workers = max(workers or 0, max(sum(rss.values()) - rss[pid] for rss in window))
+            peaks[name] = (own, workers)
+        return peaks
+
+    def report(self, records):
+        stage_rss = self.stage_rss(records)
+        stages = {}
+        for name in sorted(set(self.traced_peaks) | set(stage_rss)):
+            rss, workers = stage_rss.get(name, (None, None))
+            stages[name] = {
+                'peak_traced_bytes': self.traced_peaks.get(name),
+                'peak_rss_bytes': rss,
+                'peak_worker_rss_bytes': workers,
+            }
+        top = []
+        if self.snapshot is not None:
+            for statistic in self.snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                frame = statistic.traceback[0]
+                top.append({'site': f"{frame.filename}:{frame.lineno}", 'size_bytes': statistic.size,
+                            'count': statistic.count})
+        pid = os.getpid()
+        return {
+            'peak_traced_bytes': self.traced_peak,
+            'rss_sampled': RSS_AVAILABLE,
+            'peak_rss_bytes': max([rss[pid] for _, rss in self.samples], default=None),
+            'peak_total_rss_bytes': max([sum(rss.values()) for _, rss in self.samples], default=None),
+            # From getrusage: catches peaks between samples, but only for this process
+            'max_rss_bytes': max_rss(),
+            'samples': len(self.samples),
+            'stages': stages,
+            'top_allocations_at': self.snapshot_stage,
+            'top_allocations': top,
+        }
+
+
+def format_report(report):
+    """
+    Human-readable summary of a memory report
+    """
+    def megabytes(value):
+        return "-" if value is None else f"{value / (1 << 20):.1f} MB"
+
+    lines = [f"Peak traced (Python) memory: {megabytes(report['peak_traced_bytes'])}"]
+    if report['rss_sampled']:
+        # Both from the same samples, so the total is never below the build's own
+        lines.append(f"Peak RSS: {megabytes(report['peak_rss_bytes'])}, "
+                     f"with workers: {megabytes(report['peak_total_rss_bytes'])}")
+    else:
+        lines.append("RSS sampling unavailable (no /proc on this platform): only Python allocations are "
+                     f"reported, so decoded images are not counted. Peak RSS from getrusage: "
+                     f"{megabytes(report['max_rss_bytes'])}")
+    lines.append(f"{'stage':<16}{'traced':>12}{'rss':>12}{'workers':>12}")
+    for name, stage in sorted(report['stages'].items(), key=lambda item: -(item[1]['peak_rss_bytes'] or 0)):
+        lines.append(f"{name:<16}{megabytes(stage['peak_traced_bytes']):>12}{megabytes(stage['peak_rss_bytes']):>12}"
+                     f"{megabytes(stage['peak_worker_rss_bytes']):>12}")
+    if report['top_allocations']:
+        lines.append(f"Top allocation sites (at {report['top_allocations_at']}):")
+        for allocation in report['top_allocations']:
+            lines.append(f"  {megabytes(allocation['size_bytes']):>10}  {allocation['site']} ({allocation['count']} blocks)")
+    return "\n".join(lines)
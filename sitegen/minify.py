@@ -0,0 +1,123 @@
+import re
+
+# One lexical unit of HTML. Elements whose content is whitespace-sensitive or
+# not HTML at all are matched whole, up to their closing tag, and kept verbatim.
+TOKEN_PATTERN = re.compile(rb"""
+    (?P<comment><!--.*?-->)
+  | (?P<raw><(?P<rawname>pre|script|style|textarea)\b(?:[^>"']|"[^"]*"|'[^']*')*>.*?</(?P=rawname)\s*>)
+  | (?P<tag></?(?P<name>[A-Za-z!][\w:-]*)(?:[^>"']|"[^"]*"|'[^']*')*>)
+  | (?P<text>(?:[^<]|<(?![A-Za-z!/]))+)
+""", re.S | re.I | re.X)
+
+RAW_TAG_PATTERN = re.compile(rb"<(pre|script|style|textarea)\b", re.I)
+WHITESPACE_PATTERN = re.compile(rb"\s+")
+
+# Elements that do not flow inline: whitespace next to their tags never renders
+BLOCK_TAGS = frozenset(name.encode('ascii') for name in """
+    !doctype html head body title meta link base
+    address article aside blockquote details dialog dd div dl dt fieldset
+    figcaption figure footer form h1 h2 h3 h4 h5 h6 header hgroup hr li main
+    nav ol p pre section summary table tbody td tfoot th thead tr ul
+""".split())
+
+
+class HtmlMinifier:
+    """
+    Streaming HTML minifier: drops comments, collapses whitespace runs in text
+    to a single space and removes whitespace next to block-level tags.
+    Tags and their attributes (inline styles included), <pre>, <textarea>,
+    <script> and <style> pass through untouched, as do conditional comments.
+    Feed it byte chunks in order; a token split across chunks is held back
+    until the rest of it arrives.
+    """
+
+    def __init__(self):
+        self.buffer = b""
+        self.pending_space = False
+        self.after_block = True
+
+    def _tag(self, token, block):
+        out = b" " if self.pending_space and not (self.after_block or block) else b""
+        self.pending_space = False
+        self.after_block = block
+        return out + token
+
+    def _text(self, text):
+        core = text.strip()
+        if not core:
+            self.pending_space = True
+            return b""
+        out = b" " if (self.pending_space or text[:1].isspace()) and not self.after_block else b""
+        self.pending_space = text[-1:].isspace()
+        self.after_block = False
+        return out + WHITESPACE_PATTERN.sub(b" ", core)
+
+    def _process(self, final):
+        buffer = self.buffer
+        out = []
+        position = 0
+        while position < len(buffer):
+            match = TOKEN_PATTERN.match(buffer, position)
+            if match is not None and match.lastgroup == 'tag' and RAW_TAG_PATTERN.match(buffer, position):
+                # Opening tag of a raw element whose end has not arrived yet
+                match = None
+            if match is None or (match.lastgroup == 'tag' and buffer.startswith(b"<!--", position)):
+                if not final:
+                    break
+                # Unterminated markup at the end of the document: keep as is
+                out.append(self._tag(buffer[position:], False))
+                position = len(buffer)
+                break
+            if match.lastgroup == 'text' and match.end() == len(buffer) and not final:
+                break
+
+            token = match.group()
+            if match.lastgroup == 'comment':
+                if token.startswith(b"<!--[if"):
+                    out.append(self._tag(token, True))
+            elif match.lastgroup == 'raw':
+                out.append(self._tag(token, match.group('rawname').lower() == b"pre"))
+            elif match.lastgroup == 'tag':
+                out.append(self._tag(token, match.group('name').lower() in BLOCK_TAGS))
+            else:
+                out.append(self._text(token))
+            position = match.end()
+
+        self.buffer = buffer[position:]
+        return b"".join(out)
+
+    def feed(self, data):
+        """
+        Add a chunk of the document, returning the minified output available so far
+        """
+        self.buffer += data
+        return self._process(final=False)
+
+    def close(self):
+        """
+        Flush whatever is still held back
+        """
+        return self._process(final=True)
+
+
+def minified(chunks):
+    """
+    Minify a stream of byte chunks, yielding minified chunks
+    """
+    minifier = HtmlMinifier()
+    for chunk in chunks:
+        out = minifier.feed(chunk)
+        if out:
+            yield out
+    out = minifier.close()
+    if out:
+        yield out
+
+
+def minify_html(content):
+    """
+    Minify a whole document (str or bytes), returning bytes
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return b"".join(minified((content,)))
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import tempfile
+
+from sitegen.timing import stage
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _same_content(path, size, digest):
+    """
+    Cheap size check first, then a hash of the existing file
+    """
+    try:
+        if os.path.getsize(path) != size:
+            return False
+    except OSError:
+        return False
+    return _file_digest(path) == digest
+
+
+class OutputFile:
+    """
+    Binary output stream that replaces path atomically on close, and leaves
+    the existing file (and its mtime) alone if the content is identical.
+    Use as a context manager; .changed tells whether path was rewritten.
+    """
+
+    def __init__(self, path, buffering=-1):
+        self.path = path
+        self.changed = False
+        self.size = 0
+        self.digest = hashlib.sha256()
+        folder = os.path.dirname(path) or '.'
+        os.makedirs(folder, exist_ok=True)
+        # Temp file in the same folder so the final rename stays atomic
+        fd, self.tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=folder)
+        self.file = os.fdopen(fd, 'wb', buffering=buffering)
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        if _same_content(self.path, self.size, self.digest.digest()):
+            os.unlink(self.tmp_path)
+            return False
+        if os.path.exists(self.path):
+            # mkstemp creates files 0600; keep the permissions of the page being replaced
+            os.chmod(self.tmp_path, os.stat(self.path).st_mode & 0o777)
+        else:
+            os.chmod(self.tmp_path, 0o644)
+        os.replace(self.tmp_path, self.path)
+        self.changed = True
+        return True
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+def write_if_changed(path, content):
+    """
+    Write content (str or bytes) to path unless it already holds exactly that.
+    Returns True if the file was written.
+    """
+    with stage("write", path):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        if _same_content(path, len(content), hashlib.sha256(content).digest()):
+            return False
+        with OutputFile(path) as output:
+            output.write(content)
+        return output.changed
@@ -0,0 +1,174 @@
+import argparse
+import os
+import posixpath
+import re
+
+from sitegen.css import Used, collect_used, filter_rules, load_stylesheet, serialize
+from sitegen.fingerprint import read_manifest
+from sitegen.output import write_if_changed
+from sitegen.scan import site_pages
+
+# Trimmed stylesheets are written next to their source, so relative url()
+# references inside them keep working
+PURGED_SUFFIX = ".purged.css"
+
+LINK_PATTERN = re.compile(r"<link\b[^>]*>", re.I)
+SCRIPT_PATTERN = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.I | re.S)
+ATTRIBUTE_PATTERN = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+# Anything in a script that could be a class, id or tag name it adds at runtime
+SCRIPT_TOKEN_PATTERN = re.compile(r"[A-Za-z_][\w-]*")
+
+
+def _attributes(tag):
+    return {name.lower(): double if double is not None else single
+            for name, double, single in ATTRIBUTE_PATTERN.findall(tag)}
+
+
+def _local(url):
+    return not (url.startswith(('/', '#', 'data:')) or '://' in url or url.startswith('//'))
+
+
+def source_href(href):
+    """
+    The href of the original stylesheet, for links already pointing at a purged copy
+    """
+    if href.endswith(PURGED_SUFFIX):
+        return href[:-len(PURGED_SUFFIX)] + ".css"
+    return href
+
+
+def purged_href(href):
+    return source_href(href)[:-len(".css")] + PURGED_SUFFIX
+
+
+def _loads_stylesheet(attributes):
+    # Plain stylesheet links, and the preloads defer_stylesheets turns them into
+    rel = attributes.get('rel', '').lower().split()
+    return 'stylesheet' in rel or ('preload' in rel and attributes.get('as', '').lower() == 'style')
+
+
+def stylesheet_links(page):
+    """
+    Yield (link tag, href) for every local stylesheet linked or preloaded by page
+    """
+    for match in LINK_PATTERN.finditer(page):
+        attributes = _attributes(match.group())
+        href = attributes.get('href', '').split('?')[0].split('#')[0]
+        if _loads_stylesheet(attributes) and href.endswith('.css') and _local(href):
+            yield match.group(), href
+
+
+def asset_sources(root):
+    """
+    Hashed copy -> source asset, as paths under root, from the fingerprint
+    manifest. Fingerprinting rewrites pages in place, so on the next build
+    their links point at hashed copies (of purged copies, often).
+    """
+    return {posixpath.normpath(posixpath.join(root, hashed)): posixpath.normpath(posixpath.join(root, source))
+            for source, hashed in read_manifest(root).items()}
+
+
+def source_stylesheet(path, sources):
+    """
+    The original stylesheet behind path, which may be a purged copy, a
+    hashed copy, or a hashed copy of a purged copy
+    """
+    return source_href(sources.get(path, path))
+
+
+def scan_site(pages, sources=None):
+    """
+    Read every page and the local scripts it loads. Returns the markup usage
+    (widened with every word in the scripts, which may add classes at
+    runtime) and the source stylesheets linked, in first-seen order.
+    """
+    sources = sources or {}
+    documents = []
+    stylesheets = {}
+    script_words = set()
+    scripts_seen = set()
+    for page_path in pages:
+        with open(page_path, 'r', encoding='utf-8', errors='replace') as file:
+            page = file.read()
+        documents.append(page)
+        page_dir = os.path.dirname(page_path)
+        for _, href in stylesheet_links(page):
+            path = posixpath.normpath(posixpath.join(page_dir, href))
+            stylesheets.setdefault(source_stylesheet(path, sources), None)
+
+        for match in SCRIPT_PATTERN.finditer(page):
+            src = _attributes(match.group(1)).get('src')
+            if not src:
+                script_words.update(SCRIPT_TOKEN_PATTERN.findall(match.group(2)))
+                continue
+            script_path = posixpath.normpath(posixpath.join(page_dir, src.split('?')[0]))
+            script_path = sources.get(script_path, script_path)
+            if not _local(src) or script_path in scripts_seen or not os.path.isfile(script_path):
+                continue
+            scripts_seen.add(script_path)
+            with open(script_path, 'r', encoding='utf-8', errors='replace') as file:
+                script_words.update(SCRIPT_TOKEN_PATTERN.findall(file.read()))
+
+    used = collect_used(*documents)
+    used = Used(used.tags | {word.lower() for word in script_words}, used.classes | script_words,
+                used.ids | script_words, used.attributes | {word.lower() for word in script_words})
+    return used, list(stylesheets)
+
+
+def rewrite_links(page_path, sources=None):
+    """
+    Point the page's local stylesheet links at the purged copies
+    """
+    sources = sources or {}
+    with open(page_path, 'r', encoding='utf-8', errors='replace') as file:
+        page = file.read()
+    page_dir = os.path.dirname(page_path)
+    rewritten = page
+    for tag, href in stylesheet_links(page):
+        path = posixpath.normpath(posixpath.join(page_dir, href))
+        if sources.get(path, path).endswith(PURGED_SUFFIX):
+            # Already a purged copy, or the fingerprinted name of one
+            continue
+        purged = purged_href(source_stylesheet(path, sources))
+        if os.path.isfile(purged):
+            rewritten = rewritten.replace(tag, tag.replace(href, posixpath.relpath(purged, page_dir or '.'), 1))
+    return rewritten != page and write_if_changed(page_path, rewritten)
+
+
+def purge(root=".", rewrite=False, safelist=()):
+    """
+    Write a trimmed copy of every stylesheet the site links, keeping only the
+    rules that can match some page. With rewrite, the pages' links are
+    switched over to the trimmed copies.
+    """
+    pages = site_pages(root)
+    sources = asset_sources(root)
+    used, stylesheets = scan_site(pages, sources)
+    safelist = set(safelist)
+    used = Used(used.tags, used.classes | safelist, used.ids | safelist, used.attributes)
+
+    for path in stylesheets:
+        if not os.path.isfile(path):
+            continue
+        css = serialize(filter_rules(load_stylesheet(path), used))
+        output_path = path[:-len(".css")] + PURGED_SUFFIX
+        changed = write_if_changed(output_path, css)
+        before, after = os.path.getsize(path), len(css.encode('utf-8'))
+        status = "Purged" if changed else "Unchanged"
+        print(f"{status}: {output_path} ({before // 1024} KB -> {after // 1024} KB)")
+
+    if rewrite:
+        for page_path in pages:
+            if rewrite_links(page_path, sources):
+                print(f"Relinked: {page_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write stylesheets trimmed to the selectors the site's pages use")
+    parser.add_argument('root', nargs='?', default='.', help="site root to scan")
+    parser.add_argument('--rewrite', action='store_true', help="point the pages' stylesheet links at the trimmed copies")
+    parser.add_argument('--safelist', nargs='*', default=(), help="classes or ids to keep even if no page uses them")
+    args = parser.parse_args()
+
+    purge(args.root, rewrite=args.rewrite, safelist=args.safelist)
@@ -0,0 +1,68 @@
+import os
+from collections import namedtuple
+
+from sitegen.timing import stage
+
+ScannedFile = namedtuple('ScannedFile', ['name', 'path', 'size', 'mtime_ns'])
+
+# Extensions the generators treat as source images
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+# Folders that never hold served output
+SKIPPED_DIRS = ('.git', '.sitegen', '__pycache__', 'resized', 'node_modules')
+
+# abs path -> (directory mtime_ns, tuple of ScannedFile)
+_snapshots = {}
+
+
+def scan_dir(path):
+    """
+    Return the regular files in path, sorted by name, with their stat info.
+    Each directory is read with os.scandir once and served from memory until
+    its mtime changes.
+    """
+    key = os.path.abspath(path)
+    mtime_ns = os.stat(key).st_mtime_ns
+    snapshot = _snapshots.get(key)
+    if snapshot and snapshot[0] == mtime_ns:
+        return snapshot[1]
+
+    files = []
+    with stage("scan", path), os.scandir(key) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            files.append(ScannedFile(entry.name, os.path.join(path, entry.name), stat.st_size, stat.st_mtime_ns))
+    files.sort(key=lambda scanned: scanned.name)
+    _snapshots[key] = (mtime_ns, tuple(files))
+    return _snapshots[key][1]
+
+
+def list_files(path, extensions=None):
+    """
+    Names of the files in path, optionally limited to the given extensions
+    """
+    return [scanned.name for scanned in scan_dir(path) if extensions is None or scanned.name.endswith(extensions)]
+
+
+def invalidate(path=None):
+    """
+    Drop the snapshot of path, or of every directory
+    """
+    if path is None:
+        _snapshots.clear()
+    else:
+        _snapshots.pop(os.path.abspath(path), None)
+
+
+def site_pages(root):
+    """
+    Paths of every HTML page under root, in a stable order, skipping
+    folders that never hold served output
+    """
+    pages = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if name not in SKIPPED_DIRS)
+        pages.extend(os.path.join(folder, name) for name in sorted(files) if name.endswith('.html'))
+    return pages
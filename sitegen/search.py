@@ -0,0 +1,235 @@
+import hashlib
+import html
+import json
+import os
+import re
+
+from sitegen.manifest import record_digest, source_digest
+from sitegen.output import write_if_changed
+
+# Index files live under <site root>/SEARCH_DIR/<section>/
+SEARCH_DIR = "search"
+INDEX_NAME = "index.json"
+
+# Terms are sharded by their first letters; a query word only needs the
+# shard for its own prefix
+PREFIX_LENGTH = 2
+
+# How much one occurrence of a word counts, per field
+FIELD_WEIGHTS = {
+    'title': 8,
+    'keywords': 5,
+    'category': 5,
+    'description': 3,
+    'pointers': 2,
+    'content': 1,
+}
+
+# Characters of description kept for the result list
+SUMMARY_LENGTH = 160
+
+TAG_PATTERN = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]*>", re.I | re.S)
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset("""
+    a about after all also an and any are as at be been but by can could do does for from had has have how i if
+    in into is it its more most my no not of on or our so such than that the their them then there these they
+    this those through to too up us was we were what when where which while who why will with you your
+""".split())
+
+
+def strip_tags(markup):
+    """
+    The text of an HTML fragment, without tags, scripts or styles
+    """
+    return html.unescape(TAG_PATTERN.sub(" ", markup))
+
+
+def tokenize(text):
+    """
+    Lower-cased words of text worth indexing
+    """
+    return [word for word in WORD_PATTERN.findall(text.lower())
+            if len(word) >= PREFIX_LENGTH and word not in STOP_WORDS]
+
+
+def term_scores(fields):
+    """
+    term -> weighted number of occurrences, for a dict of field name -> text
+    (or list of texts)
+    """
+    scores = {}
+    for field, value in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        texts = value if isinstance(value, list) else [value]
+        for text in texts:
+            for term in tokenize(text):
+                scores[term] = scores.get(term, 0) + weight
+    return scores
+
+
+class SearchDocument:
+    """
+    One searchable page: where it lives, what the result list shows, and the
+    text fields to index (see FIELD_WEIGHTS)
+    """
+
+    def __init__(self, url, title, summary, fields):
+        self.url = url
+        self.title = title
+        self.summary = summary
+        self.fields = fields
+
+    def digest(self, tokenizer_digest):
+        return record_digest(self.fields, tokenizer_digest)
+
+
+class SearchIndex:
+    """
+    Inverted index of one site section, written as a small index.json (the
+    document list and available shards) plus one JSON shard per term prefix
+    mapping each term to a flat [document, score, ...] list.
+
+    The term scores of every document are cached in the build state, keyed by
+    a hash of its fields, so a rebuild only tokenizes the documents that
+    changed and only reassembles the shards of the prefixes their old or new
+    terms fall under. Adding or removing a document renumbers the ones after
+    it, so every shard is reassembled then.
+    """
+
+    def __init__(self, section, cache_path, root=".."):
+        self.section = section
+        self.cache_path = cache_path
+        self.folder = os.path.join(root, SEARCH_DIR, section)
+        self.tokenizer_digest = source_digest(__file__)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+            self.documents = cache['documents']
+            self.prefixes = set(cache['shards'])
+            self.index_digest = cache['index']
+        except (OSError, ValueError, KeyError, TypeError):
+            # No usable cache: everything is tokenized and written afresh
+            self.documents = {}
+            self.prefixes = None
+            self.index_digest = None
+        # Prefixes whose shards are out of date, or None for all of them
+        self.stale = set() if self.prefixes is not None else None
+        self.dirty = False
+
+    def _invalidate(self, terms):
+        if self.stale is not None:
+            self.stale.update(term[:PREFIX_LENGTH] for term in terms)
+
+    def update(self, documents):
+        """
+        Bring the cached term scores in line with documents (a list of
+        SearchDocument). Returns the number of documents tokenized.
+        """
+        tokenized = 0
+        urls = set()
+        for document in documents:
+            urls.add(document.url)
+            digest = document.digest(self.tokenizer_digest)
+            entry = self.documents.get(document.url)
+            if entry is not None and entry['digest'] == digest:
+                continue
+            terms = term_scores(document.fields)
+            if entry is None:
+                self.stale = None
+            else:
+                self._invalidate(entry['terms'])
+            self._invalidate(terms)
+            self.documents[document.url] = {'digest': digest, 'terms': terms}
+            tokenized += 1
+            self.dirty = True
+        for url in list(self.documents):
+            if url not in urls:
+                del self.documents[url]
+                self.stale = None
+                self.dirty = True
+        return tokenized
+
+    def shards(self, documents, prefixes=None):
+        """
+        prefix -> {term: [document, score, ...]} with documents numbered in
+        list order, for the given prefixes or all of them
+        """
+        shards = {}
+        for number, document in enumerate(documents):
+            for term, score in self.documents[document.url]['terms'].items():
+                prefix = term[:PREFIX_LENGTH]
+                if prefixes is not None and prefix not in prefixes:
+                    continue
+                postings = shards.setdefault(prefix, {}).setdefault(term, [])
+                postings += [number, score]
+        return shards
+
+    def write(self, documents):
+        """
+        Write the out-of-date shards and index.json, removing shards of
+        prefixes no document uses any more. Returns the number of files
+        rewritten.
+        """
+        index_path = os.path.join(self.folder, INDEX_NAME)
+        if not os.path.exists(index_path):
+            self.stale = None
+        os.makedirs(self.folder, exist_ok=True)
+        written = 0
+        if self.stale is None or self.stale:
+            shards = self.shards(documents, self.stale)
+            for prefix, terms in shards.items():
+                content = json.dumps(terms, sort_keys=True, separators=(',', ':'))
+                written += write_if_changed(os.path.join(self.folder, f"{prefix}.json"), content)
+            if self.stale is None:
+                self.prefixes = set(shards)
+                removed = [name for name in os.listdir(self.folder)
+                           if name != INDEX_NAME and name.endswith('.json') and name[:-len('.json')] not in shards]
+            else:
+                removed = [f"{prefix}.json" for prefix in self.stale - set(shards) if prefix in self.prefixes]
+                self.prefixes = (self.prefixes - self.stale) | set(shards)
+            for name in removed:
+                os.remove(os.path.join(self.folder, name))
+            self.stale = set()
+            self.dirty = True
+
+        index = {
+            'prefix': PREFIX_LENGTH,
+            'shards': sorted(self.prefixes),
+            'docs': [[document.url, document.title, document.summary] for document in documents],
+        }
+        content = json.dumps(index, ensure_ascii=False, separators=(',', ':'))
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if digest != self.index_digest or not os.path.exists(index_path):
+            written += write_if_changed(index_path, content)
+            self.index_digest = digest
+            self.dirty = True
+        return written
+
+    def save(self):
+        if self.dirty:
+            cache = {'documents': self.documents, 'shards': sorted(self.prefixes), 'index': self.index_digest}
+            write_if_changed(self.cache_path, json.dumps(cache, sort_keys=True, separators=(',', ':')))
+            self.dirty = False
+
+
+def summarize(text):
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    return text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+def publish_search_index(section, documents, cache_path, root=".."):
+    """
+    Refresh the search index of a site section (e.g. "blog") from its
+    documents, tokenizing only the ones whose fields changed and rewriting
+    only the shards they touch
+    """
+    documents = sorted(documents, key=lambda document: document.url)
+    index = SearchIndex(section, cache_path, root)
+    tokenized = index.update(documents)
+    written = index.write(documents)
+    index.save()
+    if tokenized or written:
+        print(f"Search index: {section} ({tokenized} documents tokenized, {written} files written)")
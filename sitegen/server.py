@@ -0,0 +1,269 @@
+# Local preview server: blog and portfolio pages are rendered on request
+# from blogs.json / projects.json with the generators' own render functions
+# and kept in memory; everything else is served from disk.
+#
+#   python -m sitegen.server --port 8000   (from the repository root)
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLOG_DIR = os.path.join(ROOT, "blog")
+PORTFOLIO_DIR = os.path.join(ROOT, "portfolio")
+
+# The generators resolve paths against the working directory, so rendering
+# changes into the generator's folder; this lock keeps that to one thread
+_render_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def load_script(path):
+    """
+    Import a generator script (they are not in a package). It is imported
+    under its file name with its folder on sys.path, so image workers
+    started with spawn or forkserver, which inherit sys.path and import the
+    render functions by module name, can find it too.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class Section:
+    """
+    A group of rendered pages that all depend on the same inputs. The pages
+    are dropped as soon as any input's size or mtime changes.
+
+    Subclasses provide inputs(), the paths (relative to folder) the pages
+    depend on, and render(name), which returns a page's bytes or None.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.pages = {}
+        self.fingerprint = None
+
+    def current_fingerprint(self):
+        fingerprint = []
+        for path in self.inputs():
+            try:
+                stat = os.stat(os.path.join(self.folder, path))
+                fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                fingerprint.append((path, None, None))
+        return fingerprint
+
+    def invalidate(self):
+        """
+        Forget everything built from the previous inputs
+        """
+        self.pages = {}
+
+    def get(self, name):
+        """
+        Return (etag, bytes) for the page, or None if this section has no such page
+        """
+        # Requests are served from several threads: checking the inputs and
+        # swapping the cache happen under the same lock as rendering
+        with _render_lock:
+            fingerprint = self.current_fingerprint()
+            if fingerprint != self.fingerprint:
+                self.invalidate()
+                self.fingerprint = fingerprint
+            if name in self.pages:
+                return self.pages[name]
+
+            with working_directory(self.folder):
+                page = self.render(name)
+            if page is None:
+                return None
+            entry = ('"' + hashlib.sha1(page).hexdigest() + '"', page)
+            self.pages[name] = entry
+            return entry
+
+
+class BlogSection(Section):
+
+    def __init__(self, json_file="blogs.json", per_page=None):
+        super().__init__(BLOG_DIR)
+        self.json_file = json_file
+        self.post_module = load_script(os.path.join(BLOG_DIR, "generate_blog.py"))
+        self.listing_module = load_script(os.path.join(BLOG_DIR, "generate_blogs_page.py"))
+        self.per_page = per_page or self.listing_module.DEFAULT_PER_PAGE
+
+    def inputs(self):
+        return [self.json_file]
+
+    def render(self, name):
+        with open(self.json_file, 'r') as file:
+            blogs = json.load(file)
+
+        listing = self.listing_module
+        pages = max((len(blogs) + self.per_page - 1) // self.per_page, 1)
+        for page in range(1, pages + 1):
+            if listing.page_path("blogs.html", page) == name:
+                stream = io.BytesIO()
+                shard = blogs[(page - 1) * self.per_page:page * self.per_page]
+                listing.write_blogs_page(shard, stream, "blogs.html", page, pages)
+                return stream.getvalue()
+
+        for blog in blogs:
+            if f"{blog['file_name']}.html" == name:
+                layout = self.post_module.site_layout.get_layout("../", scripts=False)
+                return self.post_module.render_blog_page(blog, layout)
+        return None
+
+
+class PortfolioSection(Section):
+
+    def __init__(self, json_file="projects.json"):
+        super().__init__(PORTFOLIO_DIR)
+        self.json_file = json_file
+        self.module = load_script(os.path.join(PORTFOLIO_DIR, "generate_project.py"))
+        self.state = None
+
+    def inputs(self):
+        inputs = [self.json_file]
+        try:
+            with open(os.path.join(self.folder, self.json_file), 'r') as file:
+                inputs.extend(project['image_folder'] for project in json.load(file))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return inputs
+
+    def invalidate(self):
+        super().invalidate()
+        self.state = None
+
+    def load(self):
+        """
+        Read the projects, bring resized images up to date through the image
+        cache and build the related-projects index
+        """
+        module = self.module
+        with open(self.json_file, 'r') as file:
+            projects = json.load(file)
+        image_cache = module.DerivativeCache()
+        image_jobs, project_images, _ = module.collect_project_images(projects)
+        module.run_image_jobs(image_jobs, cache=image_cache)
+        image_cache.prune()
+        self.state = {
+            'projects': {project['file_name']: project for project in projects},
+            'index': module.build_project_index(projects, project_images),
+            'images': project_images,
+            'related_cards': {},
+        }
+
+    def render(self, name):
+        if self.state is None:
+            self.load()
+        project = self.state['projects'].get(name)
+        if project is None:
+            return None
+        return self.module.render_project_page(
+            project,
+            self.state['index'],
+            self.state['images'],
+            self.state['related_cards'],
+            self.module.get_layout("../"),
+        )
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    sections = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=ROOT, **kwargs)
+
+    def rendered_page(self):
+        path = urlsplit(self.path).path.lstrip('/')
+        prefix, _, name = path.partition('/')
+        section = self.sections.get(prefix)
+        if section is None or not name:
+            return None
+        return section.get(name)
+
+    def send_rendered(self, head_only):
+        try:
+            page = self.rendered_page()
+        except Exception as e:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Render failed: {e}")
+            return True
+        if page is None:
+            return False
+
+        etag, body = page
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return True
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+        return True
+
+    def do_GET(self):
+        if not self.send_rendered(head_only=False):
+            super().do_GET()
+
+    def do_HEAD(self):
+        if not self.send_rendered(head_only=True):
+            super().do_HEAD()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview the site, rendering generated pages on request")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--per-page', type=int, default=None, help="blog cards per listing page")
+    args = parser.parse_args()
+
+    PreviewHandler.sections = {
+        'blog': BlogSection(per_page=args.per_page),
+        'portfolio': PortfolioSection(),
+    }
+    server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+    print(f"Serving preview on http://{args.host}:{args.port}/blog/blogs.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
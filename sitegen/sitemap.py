@@ -0,0 +1,164 @@
+import json
+import os
+import posixpath
+import re
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from sitegen.manifest import source_digest
+from sitegen.output import write_if_changed
+
+# Public address of the site; sitemaps and feeds need absolute URLs
+SITE_URL = "https://bitsindia.in/"
+
+SITEMAP_NAME = "sitemap.xml"
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+# Number of posts in the Atom feed
+FEED_ENTRIES = 20
+
+QUOTE_ENTITIES = {'"': "&quot;"}
+
+ENTRY_PATTERN = re.compile(r"<loc>([^<]*)</loc>\s*<lastmod>([^<]*)</lastmod>")
+
+
+def timestamp():
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def read_sitemap(path):
+    """
+    loc -> lastmod for the entries of an existing sitemap or sitemap index
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return dict(ENTRY_PATTERN.findall(file.read()))
+    except OSError:
+        return {}
+
+
+class PageDates:
+    """
+    Last-modified times of generated pages. A page's time only moves when the
+    hash of its content changes, so rebuilding an unchanged page never makes
+    it look new. Pages are only hashed when their size or mtime differ from
+    the last build's; unchanged pages are never rewritten, so theirs stay put.
+    Pages are kept in groups (one per generator) so generators sharing a
+    folder can each refresh their own pages.
+    """
+
+    def __init__(self, path, fallback=None):
+        self.path = path
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                self.pages = json.load(file)
+        except (OSError, ValueError):
+            self.pages = {}
+        # Dates from the published sitemap, for pages this state has not seen
+        self.fallback = fallback or {}
+
+    def update(self, group, pages):
+        pages = set(pages)
+        for page in pages:
+            stat = os.stat(page)
+            entry = self.pages.get(page)
+            if entry is not None and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime_ns:
+                continue
+            digest = source_digest(page)
+            if entry is not None and entry['hash'] == digest:
+                lastmod = entry['lastmod']
+            else:
+                lastmod = (self.fallback.get(page) if entry is None else None) or timestamp()
+            self.pages[page] = {'group': group, 'hash': digest, 'lastmod': lastmod,
+                                'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+            self.dirty = True
+        for page, entry in list(self.pages.items()):
+            if entry['group'] == group and page not in pages:
+                del self.pages[page]
+                self.dirty = True
+
+    def lastmod(self, page):
+        return self.pages[page]['lastmod']
+
+    def save(self):
+        if self.dirty:
+            write_if_changed(self.path, json.dumps(self.pages, indent=2, sort_keys=True))
+            self.dirty = False
+
+
+def render_sitemap(entries):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<urlset xmlns="{SITEMAP_NAMESPACE}">']
+    for loc, lastmod in entries:
+        lines.append(f"  <url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_sitemap_index(entries):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">']
+    for loc, lastmod in entries:
+        lines.append(f"  <sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></sitemap>")
+    lines.append("</sitemapindex>")
+    return "\n".join(lines) + "\n"
+
+
+def publish_sitemap(section, group, pages, dates_path, site_url=SITE_URL):
+    """
+    Refresh the sitemap of a site section (e.g. "blog/", written to the
+    current folder) with the given pages, and its entry in the sitemap index
+    at the site root. Files are only rewritten when an entry changed.
+    Returns the PageDates, for feeds built from the same pages.
+    """
+    section_url = site_url + section
+    published = {loc[len(section_url):]: lastmod for loc, lastmod in read_sitemap(SITEMAP_NAME).items()
+                 if loc.startswith(section_url)}
+    dates = PageDates(dates_path, fallback=published)
+    dates.update(group, pages)
+    dates.save()
+
+    entries = [(section_url + page, dates.lastmod(page)) for page in sorted(dates.pages)]
+    if write_if_changed(SITEMAP_NAME, render_sitemap(entries)):
+        print(f"Sitemap updated: {SITEMAP_NAME}")
+
+    index_path = posixpath.join(posixpath.relpath(".", section) if section else ".", SITEMAP_NAME)
+    index = read_sitemap(index_path)
+    if entries:
+        index[section_url + SITEMAP_NAME] = max(lastmod for _, lastmod in entries)
+    else:
+        index.pop(section_url + SITEMAP_NAME, None)
+    write_if_changed(index_path, render_sitemap_index(sorted(index.items())))
+    return dates
+
+
+def render_atom_feed(title, feed_url, site_url, entries):
+    """
+    An Atom feed; entries are dicts with id, title, link, published, updated,
+    summary and author. The feed's own updated time is that of its newest
+    entry, so an unchanged set of entries renders byte-identical.
+    """
+    updated = max((entry['updated'] for entry in entries), default="1970-01-01T00:00:00+00:00")
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        f'<feed xmlns="{ATOM_NAMESPACE}">',
+        f"  <title>{escape(title)}</title>",
+        f"  <id>{escape(feed_url)}</id>",
+        f'  <link rel="self" href="{escape(feed_url, QUOTE_ENTITIES)}"/>',
+        f'  <link href="{escape(site_url, QUOTE_ENTITIES)}"/>',
+        f"  <updated>{updated}</updated>",
+    ]
+    for entry in entries:
+        lines += [
+            "  <entry>",
+            f"    <title>{escape(entry['title'])}</title>",
+            f"    <id>{escape(entry['id'])}</id>",
+            f'    <link href="{escape(entry["link"], QUOTE_ENTITIES)}"/>',
+            f"    <published>{entry['published']}</published>",
+            f"    <updated>{entry['updated']}</updated>",
+            f"    <author><name>{escape(entry['author'])}</name></author>",
+            f"    <summary>{escape(entry['summary'])}</summary>",
+            "  </entry>",
+        ]
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
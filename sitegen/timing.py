@@ -0,0 +1,166 @@
+import contextlib
+import json
+import os
+import time
+
+# Items listed in the report's slowest table
+SLOWEST_ITEMS = 20
+
+
+class BuildTimer:
+    """
+    Collects (stage, item, start, seconds, pid) records from timing hooks
+    around the build stages. Recording is off until enabled, so the hooks
+    cost next to nothing in normal builds. Starts come from perf_counter,
+    which is system-wide monotonic on Linux, so records made in worker
+    processes line up with the parent's.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.started = None
+        # Objects with enter(name) and exit(name, item), called around every stage
+        self.listeners = []
+
+    def enable(self):
+        self.enabled = True
+        self.records = []
+        self.started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name, item=None):
+        if not self.enabled:
+            yield
+            return
+        for listener in self.listeners:
+            listener.enter(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.records.append((name, item, start, time.perf_counter() - start, os.getpid()))
+            for listener in self.listeners:
+                listener.exit(name, item)
+
+    def report(self):
+        """
+        Per-stage totals and p50/p95/max item times, and the slowest items overall
+        """
+        durations = {}
+        for name, _, _, seconds, _ in self.records:
+            durations.setdefault(name, []).append(seconds)
+        stages = {}
+        for name, values in durations.items():
+            values.sort()
+            stages[name] = {
+                'count': len(values),
+                'total_seconds': round(sum(values), 6),
+                'p50_seconds': round(_percentile(values, 50), 6),
+                'p95_seconds': round(_percentile(values, 95), 6),
+                'max_seconds': round(values[-1], 6),
+            }
+        slowest = sorted(self.records, key=lambda record: record[3], reverse=True)[:SLOWEST_ITEMS]
+        return {
+            'total_seconds': round(time.perf_counter() - self.started, 6) if self.started is not None else 0.0,
+            'stages': stages,
+            'slowest': [{'stage': name, 'item': item, 'seconds': round(seconds, 6)}
+                        for name, item, _, seconds, _ in slowest],
+        }
+
+    def trace(self):
+        """
+        The records as a Chrome trace-event document: one complete ("X")
+        event per record, on a track per process, with times in
+        microseconds from the start of the build
+        """
+        origin = self.started if self.started is not None else 0.0
+        main_pid = os.getpid()
+        events = []
+        for pid in sorted({record[4] for record in self.records} | {main_pid}):
+            label = "build" if pid == main_pid else f"image worker {pid}"
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': pid, 'args': {'name': label}})
+        for name, item, start, seconds, pid in self.records:
+            event = {
+                'name': name if item is None else f"{name} {item}",
+                'cat': name,
+                'ph': 'X',
+                'ts': round((start - origin) * 1e6, 1),
+                'dur': round(seconds * 1e6, 1),
+                'pid': pid,
+                'tid': pid,
+            }
+            if item is not None:
+                event['args'] = {'item': item}
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def _percentile(values, percent):
+    # Nearest-rank percentile of sorted values
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[rank - 1]
+
+
+# One timer per process; worker processes send their records back with collect()
+timer = BuildTimer()
+stage = timer.stage
+
+
+def collect(enabled, function, *args):
+    """
+    Run function(*args) in a worker process with recording switched on or
+    off as in the parent. Returns (result, the records made meanwhile).
+    """
+    timer.enabled = enabled
+    # Listeners inherited from a forked parent stay with the parent
+    timer.listeners = []
+    start = len(timer.records)
+    result = function(*args)
+    records = timer.records[start:]
+    del timer.records[start:]
+    return result, records
+
+
+def _write_json(path, document, indent=None):
+    # Plain write: sitegen.output imports this module
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=indent)
+        file.write("\n")
+
+
+@contextlib.contextmanager
+def build_report(path, trace_path=None, profile_memory=False):
+    """
+    Record timings for the duration of the block, then write the report to
+    path and the trace-event timeline to trace_path (both JSON). With
+    profile_memory, peak memory per stage and the top allocation sites are
+    printed too, and added to the report. Without any of these, nothing is
+    recorded.
+    """
+    if not path and not trace_path and not profile_memory:
+        yield
+        return
+    timer.enable()
+    profiler = None
+    if profile_memory:
+        # Only imported when asked for: it relies on POSIX-only APIs
+        from sitegen.memory import MemoryProfiler, format_report
+        profiler = MemoryProfiler()
+        timer.listeners.append(profiler)
+        profiler.start()
+    try:
+        yield
+    finally:
+        report = timer.report()
+        if profiler is not None:
+            profiler.stop()
+            timer.listeners.remove(profiler)
+            report['memory'] = profiler.report(timer.records)
+            print(format_report(report['memory']))
+        if path:
+            _write_json(path, report, indent=2)
+            print(f"Build report: {path}")
+        if trace_path:
+            _write_json(trace_path, timer.trace())
+            print(f"Build trace: {trace_path}")
@@ -0,0 +1,240 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# Entries the generators write themselves inside watched folders
+IGNORED_NAMES = ('resized', '.sitegen', '__pycache__')
+
+# inotify event flags, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Quiet period used to batch the bursts of events a single save produces
+DEBOUNCE_SECONDS = 0.05
+
+
+def _ignored(name):
+    return name in IGNORED_NAMES or name.startswith('.') or name.endswith(('.tmp', '~'))
+
+
+def _targets(paths):
+    """
+    Map each folder to watch to the names of interest in it (None = any entry).
+    Files are watched through their folder, since editors often save by
+    replacing the file rather than writing to it.
+    """
+    targets = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            targets[path] = None
+        else:
+            folder, name = os.path.split(path)
+            names = targets.setdefault(folder, set())
+            if names is not None:
+                names.add(name)
+    return targets
+
+
+class PollingWatcher:
+    """
+    Portable fallback: compare stat snapshots of the watched paths
+    """
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.targets = {}
+        self.snapshot = {}
+
+    def set_paths(self, paths):
+        self.targets = _targets(paths)
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for folder, names in self.targets.items():
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if _ignored(entry.name) or (names is not None and entry.name not in names):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self):
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux watcher built on inotify through libc, no extra dependencies
+    """
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.targets = {}
+
+    def set_paths(self, paths):
+        # Existing watches are kept so events queued meanwhile are not lost
+        self.targets = _targets(paths)
+        for wd, folder in list(self.watches.items()):
+            if folder not in self.targets:
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+        watched = set(self.watches.values())
+        for folder in self.targets:
+            if folder in watched:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = folder
+
+    def _read(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            folder = self.watches.get(wd)
+            if folder is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                changed.add(folder)
+                continue
+            names = self.targets.get(folder)
+            if not name or _ignored(name) or (names is not None and name not in names):
+                continue
+            changed.add(os.path.join(folder, name))
+        return changed
+
+    def wait(self):
+        changed = set()
+        while not changed:
+            changed = self._read(None)
+        # Batch the rest of the burst (temp file, rename, chmod...)
+        while True:
+            more = self._read(DEBOUNCE_SECONDS)
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher():
+    """
+    inotify where the platform has it, polling everywhere else
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher()
+
+
+def code_files(*scripts):
+    """
+    The given scripts plus every module of this package
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    modules = [os.path.join(package, name) for name in os.listdir(package) if name.endswith('.py')]
+    return [os.path.abspath(script) for script in scripts] + sorted(modules)
+
+
+def restart():
+    """
+    Re-run the current script, so edited templates and code take effect
+    """
+    print("Code changed, restarting")
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+def watch(get_paths, rebuild, code_paths=()):
+    """
+    Build once, then rebuild after every change under the watched paths.
+    get_paths() is asked again before each build, so new image folders are
+    picked up. rebuild(changed) receives the changed paths. A change to one
+    of code_paths restarts the process instead, since Python code (and the
+    templates inside it) cannot be reloaded in place.
+    """
+    code_paths = {os.path.abspath(path) for path in code_paths}
+    watcher = make_watcher()
+    print(f"Watching for changes ({type(watcher).__name__}), press Ctrl+C to stop")
+    try:
+        # Paths are (re)registered before each build so edits made while it runs are caught
+        watcher.set_paths(set(get_paths()) | code_paths)
+        try:
+            rebuild(set())
+        except Exception as e:
+            # A broken input should not end watch mode before it can be fixed
+            print(f"Build failed: {e}")
+        while True:
+            changed = watcher.wait()
+            if changed & code_paths:
+                watcher.close()
+                restart()
+            started = time.perf_counter()
+            try:
+                watcher.set_paths(set(get_paths()) | code_paths)
+            except (OSError, ValueError) as e:
+                print(f"Could not refresh watched paths: {e}")
+            names = ", ".join(sorted(os.path.relpath(path) for path in changed))
+            print(f"Changed: {names}")
+            try:
+                rebuild(changed)
+            except Exception as e:
+                # Keep watching; the next save usually fixes a broken JSON file
+                print(f"Rebuild failed: {e}")
+            print(f"Rebuilt in {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()